@@ -1,6 +1,9 @@
+import logging
 import tkinter as tk
 from tkinter import ttk
 
+log = logging.getLogger(__name__)
+
 class CargoInputFrame:
     def __init__(self, parent, on_cancel_callback=None, on_confirm_callback=None):
         self.parent = parent
@@ -280,13 +283,13 @@ class CargoInputFrame:
         else:
             value1 = self.entry1.get()
             value2 = self.entry2.get()
-            print(f"確認輸入: {value1} - {value2}")
+            log.debug("確認輸入: %s - %s", value1, value2)
     
     def on_cancel(self):
         """取消按鈕的回調函數"""
         if self.on_cancel_callback:
             self.on_cancel_callback()
-        print("已取消輸入")
+        log.debug("已取消輸入")
 
     def get_entry_values(self):
         """取得車牌輸入框內容"""
@@ -375,7 +378,7 @@ class CustomerFrame:
     
     def create_customer_buttons(self):
         """根據 CustomerID 陣列建立廠商按鈕（Toggle 模式）"""
-        print(f"DEBUG: create_customer_buttons 中，self.customer_id_list = {self.customer_id_list}")
+        log.debug("create_customer_buttons: %d 筆廠商 %s", len(self.customer_id_list), self.customer_id_list)
         
         if not self.customer_id_list:
             label = tk.Label(
@@ -456,7 +459,7 @@ class CustomerFrame:
             self.selected_customer = None
             self.customer_buttons[customer_name].config(bg="#90CAF9", fg="black", relief=tk.RAISED)
             self.display_frame.config(text="未選擇客戶")
-            print(f"已取消選擇: {customer_name}")
+            log.debug("已取消選擇: %s", customer_name)
         else:
             # 如果之前有選擇的按鈕，恢復其樣式
             if self.selected_customer is not None:
@@ -466,16 +469,16 @@ class CustomerFrame:
             self.selected_customer = customer_name
             self.customer_buttons[customer_name].config(bg="#2196F3", fg="white", relief=tk.SUNKEN)
             self.display_frame.config(text=f"已選擇: {customer_name}")
-            print(f"已選擇廠商: {customer_name}")
+            log.debug("已選擇廠商: %s", customer_name)
     
     def on_confirm(self):
         """確認按鈕的回調函數"""
         if self.on_confirm_callback:
             self.on_confirm_callback()
         elif self.selected_customer:
-            print(f"確認選擇廠商: {self.selected_customer}")
+            log.debug("確認選擇廠商: %s", self.selected_customer)
         else:
-            print("請先選擇廠商")
+            log.debug("請先選擇廠商")
     
     def on_cancel(self):
         """取消按鈕的回調函數"""
@@ -488,7 +491,7 @@ class CustomerFrame:
         
         if self.on_cancel_callback:
             self.on_cancel_callback()
-        print("已取消選擇")
+        log.debug("已取消選擇")
 
     def get_display_text(self):
         """取得顯示框內容"""
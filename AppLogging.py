@@ -0,0 +1,55 @@
+"""
+程式記錄設定：輪替記錄檔與主控台
+
+各模組以 logging.getLogger(__name__) 取得 logger，訊息參數使用 % 格式延遲展開，
+低於設定等級的訊息不會格式化（例如 DEBUG 等級的整份客戶/商品清單）。
+
+環境變數：
+    WEIGHTSTATION_LOG_LEVEL   記錄等級（DEBUG/INFO/WARNING/ERROR），預設 INFO
+    WEIGHTSTATION_LOG_FILE    記錄檔路徑，預設 weightstation.log；設為空字串則不寫檔
+"""
+import logging
+import logging.handlers
+import os
+import sys
+
+LOG_FILE = "weightstation.log"
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+_configured = False
+
+
+def setup_logging(level=None, log_file=None):
+    """設定根 logger（只執行一次），回傳實際使用的等級"""
+    global _configured
+    root = logging.getLogger()
+    if _configured:
+        return root.level
+
+    level_name = (level or os.environ.get("WEIGHTSTATION_LOG_LEVEL") or "INFO").upper()
+    level_value = logging.getLevelName(level_name)
+    if not isinstance(level_value, int):
+        level_value = logging.INFO
+    root.setLevel(level_value)
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    if log_file is None:
+        log_file = os.environ.get("WEIGHTSTATION_LOG_FILE", LOG_FILE)
+    if log_file:
+        # delay=True：第一筆記錄才開檔，不增加啟動時間
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True
+        )
+        file_handler.setFormatter(formatter)
+        root.addHandler(file_handler)
+
+    # PyInstaller --windowed 的 EXE 沒有主控台，sys.stderr 為 None
+    if sys.stderr is not None:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        root.addHandler(console_handler)
+
+    _configured = True
+    return level_value
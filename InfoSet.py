@@ -1,7 +1,11 @@
+import logging
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
 import sqlite3
+from StockDB import get_connection
+
+log = logging.getLogger(__name__)
 
 def create_info_frame(parent):
     """
@@ -113,12 +117,12 @@ def create_info_frame(parent):
             name_entry.insert(0, selected_item)
             value_entry.delete(0, tk.END)
             value_entry.insert(0, str(price) if price is not None else "")
-            print(f"✓ 已載入商品: {selected_item}, 價格: {price}")
+            log.debug("已載入商品: %s, 價格: %s", selected_item, price)
         elif selected_type == "客戶" and selected_item:
             name_entry.delete(0, tk.END)
             name_entry.insert(0, selected_item)
             value_entry.delete(0, tk.END)
-            print(f"✓ 已載入客戶: {selected_item}")
+            log.debug("已載入客戶: %s", selected_item)
     
     # 綁定 dataCombo 的值變化事件
     dataCombo.bind("<<ComboboxSelected>>", on_data_combo_change)
@@ -127,7 +131,7 @@ def create_info_frame(parent):
     def on_combo_change(event):
         """監聽 combo_box 的值變化，動態更新 dataCombo"""
         selected_type = combo_box.get()
-        print(f"✓ combo_box 值已變化: {selected_type}")
+        log.debug("combo_box 值已變化: %s", selected_type)
 
         # 清空輸入欄位
         name_entry.delete(0, tk.END)
@@ -137,11 +141,11 @@ def create_info_frame(parent):
 
         if selected_type == "客戶":
             dataCombo['values'] = app.CustomerID
-            print(f"  已載入客戶資料: {app.CustomerID}")
+            log.debug("已載入客戶資料: %s", app.CustomerID)
         elif selected_type == "品項":
             items = list(app.ItemValue.keys())
             dataCombo['values'] = items
-            print(f"  已載入商品資料: {items}")
+            log.debug("已載入商品資料: %s", items)
 
         dataCombo.current(0) if dataCombo['values'] else None
     
@@ -156,7 +160,7 @@ def create_info_frame(parent):
         app.load_item_data()  # 重新載入確保資料最新
         app.load_customer_data()  # 重新載入確保資料最新
         on_combo_change(None)
-        print("✓ InfoSet 視窗已初始化並載入資料")
+        log.debug("InfoSet 視窗已初始化並載入資料")
     
     parent.after(100, init_combo_data)
 
@@ -165,26 +169,22 @@ def create_info_frame(parent):
         import main as app
 
         try:
-            conn_cust = sqlite3.connect("CustomerID.db")
-            cur_cust = conn_cust.cursor()
-            cur_cust.execute("DELETE FROM customers")
-            cur_cust.executemany("INSERT INTO customers (name) VALUES (?)",
-                                 [(name,) for name in app.CustomerID])
-            conn_cust.commit()
-            conn_cust.close()
-            print(f"✓ 已同步 {len(app.CustomerID)} 筆客戶至 CustomerID.db")
+            conn_cust = get_connection("CustomerID.db")
+            with conn_cust:
+                conn_cust.execute("DELETE FROM customers")
+                conn_cust.executemany("INSERT INTO customers (name) VALUES (?)",
+                                      [(name,) for name in app.CustomerID])
+            log.info("已同步 %d 筆客戶至 CustomerID.db", len(app.CustomerID))
         except sqlite3.OperationalError as e:
             messagebox.showerror("錯誤", f"寫入 CustomerID.db 失敗: {e}")
 
         try:
-            conn_item = sqlite3.connect("ItemValue.db")
-            cur_item = conn_item.cursor()
-            cur_item.execute("DELETE FROM items")
-            cur_item.executemany("INSERT INTO items (name, price) VALUES (?, ?)",
-                                 [(n, float(p)) for n, p in app.ItemValue.items()])
-            conn_item.commit()
-            conn_item.close()
-            print(f"✓ 已同步 {len(app.ItemValue)} 筆品項至 ItemValue.db")
+            conn_item = get_connection("ItemValue.db")
+            with conn_item:
+                conn_item.execute("DELETE FROM items")
+                conn_item.executemany("INSERT INTO items (name, price) VALUES (?, ?)",
+                                      [(n, float(p)) for n, p in app.ItemValue.items()])
+            log.info("已同步 %d 筆品項至 ItemValue.db", len(app.ItemValue))
         except sqlite3.OperationalError as e:
             messagebox.showerror("錯誤", f"寫入 ItemValue.db 失敗: {e}")
 
@@ -218,7 +218,7 @@ def create_info_frame(parent):
             # 將新客戶名稱加入陣列
             app.CustomerID.append(name_value)
             messagebox.showinfo("成功", f"已新增客戶: {name_value}")
-            print(f"✓ 已新增客戶: {name_value}")
+            log.info("已新增客戶: %s", name_value)
             
             # 更新 dataCombo
             dataCombo['values'] = app.CustomerID
@@ -248,7 +248,7 @@ def create_info_frame(parent):
                 price_float = float(price_value)
                 app.ItemValue[name_value] = price_float
                 messagebox.showinfo("成功", f"已新增品項: {name_value}, 價格: {price_float}")
-                print(f"✓ 已新增品項: {name_value}, 價格: {price_float}")
+                log.info("已新增品項: %s, 價格: %s", name_value, price_float)
 
                 # 更新 dataCombo
                 items = list(app.ItemValue.keys())
@@ -288,7 +288,7 @@ def create_info_frame(parent):
                 price_float = float(value_value)
                 app.ItemValue[name_value] = price_float
                 messagebox.showinfo("成功", f"已修改品項: {name_value}, 新價格: {price_float}")
-                print(f"✓ 已修改品項: {name_value}, 新價格: {price_float}")
+                log.info("已修改品項: %s, 新價格: %s", name_value, price_float)
                 
                 # 清空輸入欄位
                 name_entry.delete(0, tk.END)
@@ -324,7 +324,7 @@ def create_info_frame(parent):
             name_entry.delete(0, tk.END)
             value_entry.delete(0, tk.END)
             messagebox.showinfo("成功", f"已刪除品項: {name_value}")
-            print(f"✓ 已刪除品項: {name_value}")
+            log.info("已刪除品項: %s", name_value)
 
         elif selected_type == "客戶":
             if name_value not in app.CustomerID:
@@ -337,7 +337,7 @@ def create_info_frame(parent):
             name_entry.delete(0, tk.END)
             value_entry.delete(0, tk.END)
             messagebox.showinfo("成功", f"已刪除客戶: {name_value}")
-            print(f"✓ 已刪除客戶: {name_value}")
+            log.info("已刪除客戶: %s", name_value)
 
     btn_delete = tk.Button(bottom_frame, text="刪除", width=button_width, height=button_height, font=("Arial", 16), command=on_btn_delete_click)
     btn_delete.pack(side=tk.LEFT, expand=True, fill=tk.BOTH, padx=2)
@@ -0,0 +1,267 @@
+import logging
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+from StockDB import DB_PATH, get_connection
+
+log = logging.getLogger(__name__)
+
+# 批次處理的筆數（舊結構搬移、欄位回填皆每批各自提交，中斷後可從下一批接續）
+BATCH_ROWS = 50000
+
+# item_details 的衍生欄位：netw = 貨重 - 扣重，account = total = 淨重 × 價格
+_NETW_EXPR = "(COALESCE({p}grossw, 0) - COALESCE({p}minus, 0))"
+_ACCOUNT_EXPR = _NETW_EXPR + " * COALESCE({p}price, 0)"
+
+
+@contextmanager
+def _transaction(conn):
+    """明確以 BEGIN 開始交易，讓 DDL 也包含在同一個交易內"""
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
+def log_progress(description, done, total):
+    """預設的進度回報：寫入記錄"""
+    percent = (done * 100 // total) if total else 100
+    log.info("%s: %d/%d (%d%%)", description, done, total, percent)
+
+
+def _table_columns(conn, table):
+    return [col[1] for col in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def _create_base_tables(conn, progress):
+    """建立 stockinhand 與 item_details（已存在則略過）"""
+    with _transaction(conn):
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stockinhand (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                inout INTEGER,
+                date TEXT,
+                number TEXT,
+                name TEXT,
+                carno TEXT,
+                closeflag INTEGER,
+                fluctuation INTEGER
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS item_details (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                stockinhand_id INTEGER,
+                seq INTEGER,
+                item TEXT,
+                heavy FLOAT,
+                empty FLOAT,
+                grossw FLOAT,
+                minus FLOAT,
+                netw FLOAT,
+                account FLOAT,
+                total FLOAT,
+                price FLOAT,
+                FOREIGN KEY (stockinhand_id) REFERENCES stockinhand(id) ON DELETE CASCADE
+            )
+            """
+        )
+
+
+def _split_legacy_items(conn, progress):
+    """
+    將舊結構（品項欄位直接放在 stockinhand）拆成 stockinhand + item_details
+
+    以 INSERT ... SELECT 依 id 範圍分批複製，每批提交一次；
+    stockinhand_new 內已複製的最大 id 即為續傳位置，中斷後重新執行會從該處繼續。
+    """
+    if "item" not in _table_columns(conn, "stockinhand"):
+        return
+
+    log.info("偵測到舊的資料庫結構，正在升級")
+    with _transaction(conn):
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stockinhand_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                inout INTEGER,
+                date TEXT,
+                number TEXT,
+                name TEXT,
+                carno TEXT,
+                closeflag INTEGER,
+                fluctuation INTEGER
+            )
+            """
+        )
+
+    total = conn.execute("SELECT COUNT(*) FROM stockinhand").fetchone()[0]
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM stockinhand").fetchone()[0]
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM stockinhand_new").fetchone()[0]
+    done = conn.execute("SELECT COUNT(*) FROM stockinhand_new").fetchone()[0]
+    if done:
+        log.info("從上次中斷處繼續升級（已完成 %d 筆）", done)
+
+    while last_id < max_id:
+        upper = last_id + BATCH_ROWS
+        with _transaction(conn):
+            cursor = conn.execute(
+                """
+                INSERT INTO stockinhand_new (id, inout, date, number, name, carno, closeflag, fluctuation)
+                SELECT id, inout, date, number, name, carno, closeflag, fluctuation
+                FROM stockinhand
+                WHERE id > ? AND id <= ?
+                """,
+                (last_id, upper),
+            )
+            copied = cursor.rowcount
+            # 有品項資料者才建立第一筆 item_details
+            conn.execute(
+                """
+                INSERT INTO item_details (stockinhand_id, seq, item, heavy, empty, grossw, minus, netw, account, total, price)
+                SELECT id, 1, item, heavy, empty, grossw, minus, netw, account, total, price
+                FROM stockinhand
+                WHERE id > ? AND id <= ? AND item IS NOT NULL AND item != ''
+                """,
+                (last_id, upper),
+            )
+        last_id = upper
+        done += copied
+        if progress:
+            progress("搬移交易記錄", done, total)
+
+    # 刪除舊表並重命名
+    with _transaction(conn):
+        conn.execute("DROP TABLE stockinhand")
+        conn.execute("ALTER TABLE stockinhand_new RENAME TO stockinhand")
+    log.info("資料庫升級完成")
+
+
+def _persist_item_amounts(conn, progress):
+    """
+    以觸發器維護 item_details 的 netw/account/total，並回填歷史資料
+
+    寫入或修改 grossw、minus、price 時由 SQLite 自動重算，
+    報表可直接對這些欄位加總，不需要在 Python 端重新推導。
+    """
+    netw_new = _NETW_EXPR.format(p="NEW.")
+    account_new = _ACCOUNT_EXPR.format(p="NEW.")
+    with _transaction(conn):
+        for name, event in (
+            ("item_details_amounts_insert", "AFTER INSERT ON item_details"),
+            ("item_details_amounts_update", "AFTER UPDATE OF grossw, minus, price ON item_details"),
+        ):
+            conn.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {name} {event}
+                BEGIN
+                    UPDATE item_details
+                    SET netw = {netw_new}, account = {account_new}, total = {account_new}
+                    WHERE id = NEW.id;
+                END
+                """
+            )
+
+    total = conn.execute("SELECT COUNT(*) FROM item_details").fetchone()[0]
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM item_details").fetchone()[0]
+    netw_expr = _NETW_EXPR.format(p="")
+    account_expr = _ACCOUNT_EXPR.format(p="")
+    last_id = 0
+    done = 0
+    while last_id < max_id:
+        upper = last_id + BATCH_ROWS
+        with _transaction(conn):
+            cursor = conn.execute(
+                f"""
+                UPDATE item_details
+                SET netw = {netw_expr}, account = {account_expr}, total = {account_expr}
+                WHERE id > ? AND id <= ?
+                """,
+                (last_id, upper),
+            )
+        last_id = upper
+        done += cursor.rowcount
+        if progress:
+            progress("回填品項淨重與小計", done, total)
+
+
+def _create_ticket_sequence(conn, progress):
+    """
+    建立每日單號序列表 ticket_sequence，並以既有交易的最大單號初始化
+
+    已存在的序列值只會往上調整，重複執行不會讓單號倒退。
+    """
+    with _transaction(conn):
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ticket_sequence (
+                date TEXT PRIMARY KEY,
+                last_number INTEGER NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            INSERT INTO ticket_sequence (date, last_number)
+            SELECT date, MAX(CAST(number AS INTEGER)) FROM stockinhand
+            WHERE date IS NOT NULL
+            GROUP BY date
+            ON CONFLICT(date) DO UPDATE SET last_number = MAX(last_number, excluded.last_number)
+            """
+        )
+
+
+# 依版本排序的遷移步驟：(版本, 說明, 函式)
+# 每個步驟必須可重複執行；完成後才寫入 schema_history 與 user_version
+MIGRATIONS = [
+    (1, "建立 stockinhand 與 item_details", _create_base_tables),
+    (2, "拆分舊結構的品項欄位至 item_details", _split_legacy_items),
+    (3, "維護 item_details 的 netw/account/total 欄位", _persist_item_amounts),
+    (4, "建立每日單號序列 ticket_sequence", _create_ticket_sequence),
+]
+
+
+def migrate_stock_database(db_path=DB_PATH, progress=log_progress):
+    """
+    依 PRAGMA user_version 執行 stockinhand.db 尚未套用的遷移步驟
+
+    每個完成的步驟都會記錄在 schema_history 表，回傳遷移後的版本號。
+    """
+    conn = get_connection(db_path)
+    with _transaction(conn):
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_history (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TEXT NOT NULL
+            )
+            """
+        )
+
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    for version, description, func in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            func(conn, progress)
+            with _transaction(conn):
+                conn.execute(
+                    "INSERT OR REPLACE INTO schema_history (version, description, applied_at) VALUES (?, ?, ?)",
+                    (version, description, datetime.now().isoformat(timespec="seconds")),
+                )
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+        except sqlite3.Error as e:
+            log.error("資料庫遷移 v%d 失敗: %s", version, e)
+            raise
+        current = version
+        log.info("已套用資料庫遷移 v%d: %s", version, description)
+    return current
@@ -1,5 +1,8 @@
+import logging
 import tkinter as tk
 
+log = logging.getLogger(__name__)
+
 class NumericKeypad:
     def __init__(self, parent, on_confirm_callback=None, on_cancel_callback=None):
         """
@@ -224,13 +227,13 @@ class NumericKeypad:
         """確定按鈕的回調函數"""
         if self.on_confirm_callback:
             self.on_confirm_callback(self.input_value)
-        print(f"確定輸入: {self.input_value}")
+        log.debug("確定輸入: %s", self.input_value)
     
     def on_cancel(self):
         """取消按鈕的回調函數"""
         if self.on_cancel_callback:
             self.on_cancel_callback()
-        print("已取消輸入")
+        log.debug("已取消輸入")
     
     def get_value(self):
         """取得輸入的數值"""
@@ -244,10 +247,10 @@ def main():
     root.geometry("600x700")
     
     def on_confirm(value):
-        print(f"輸入的數值: {value}")
+        log.debug("輸入的數值: %s", value)
     
     def on_cancel():
-        print("已取消")
+        log.debug("已取消")
     
     keypad = NumericKeypad(root, on_confirm_callback=on_confirm, on_cancel_callback=on_cancel)
     
@@ -0,0 +1,152 @@
+"""
+磅秤原始資料錄製檔（.wscap）的寫入、讀取與重播
+
+檔案格式：開頭為 MAGIC，之後每次序列埠讀取為一筆記錄：
+    int64 時間戳記（Unix 奈秒，little-endian）+ uint16 長度 + 原始位元組
+
+用法：
+    python ScaleCapture.py replay capture.wscap [--speed 1] [--frame lf] [--profile auto] [--verbose]
+    python ScaleCapture.py raw capture.wscap output.bin
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+
+MAGIC = b"WSCAP1\n"
+RECORD_HEADER = struct.Struct("<qH")
+MAX_RECORD = 0xFFFF
+# 錄製中定期寫出緩衝的間隔（秒）
+FLUSH_INTERVAL = 1.0
+
+
+class CaptureWriter:
+    """
+    將序列埠讀到的原始位元組附加到錄製檔
+
+    每筆只多 10 個位元組的表頭，寫入經過緩衝，不會每次讀取都觸發磁碟 I/O；
+    距上次寫出超過 flush_interval 秒時寫出緩衝，程式異常結束最多只遺失這段時間的資料。
+    """
+
+    def __init__(self, path, buffering=64 * 1024, flush_interval=FLUSH_INTERVAL):
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.path = path
+        self.flush_interval = flush_interval
+        self._file = open(path, "ab", buffering=buffering)
+        if is_new:
+            self._file.write(MAGIC)
+        self.records = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, data, timestamp_ns=None):
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        for start in range(0, len(data), MAX_RECORD):
+            chunk = data[start:start + MAX_RECORD]
+            self._file.write(RECORD_HEADER.pack(timestamp_ns, len(chunk)))
+            self._file.write(chunk)
+            self.records += 1
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def capture_path(directory, name):
+    """錄製檔路徑：<目錄>/capture-<名稱>-<日期時間>.wscap"""
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+    return os.path.join(directory, f"capture-{safe}-{time.strftime('%Y%m%d-%H%M%S')}.wscap")
+
+
+def read_capture(path):
+    """依序產生錄製檔中的 (時間戳記奈秒, 原始位元組)；檔尾不完整的記錄會被忽略"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"不是磅秤錄製檔: {path}")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            timestamp_ns, length = RECORD_HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            yield timestamp_ns, data
+
+
+def replay(path, decoder, speed=0.0, on_value=None):
+    """
+    將錄製檔依原本的時間間隔餵給 decoder
+
+    speed 為播放倍速（1 為實際速度），0 表示不等待、全速解碼；
+    回傳 (記錄數, 位元組數, 讀數數, 解碼耗時秒數)。
+    """
+    records = size = count = 0
+    decode_time = 0.0
+    first_ts = None
+    started = time.perf_counter()
+    for timestamp_ns, data in read_capture(path):
+        if speed > 0:
+            if first_ts is None:
+                first_ts = timestamp_ns
+            delay = (timestamp_ns - first_ts) / 1e9 / speed - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+        t0 = time.perf_counter()
+        values = decoder.feed(data)
+        decode_time += time.perf_counter() - t0
+        records += 1
+        size += len(data)
+        count += len(values)
+        if on_value is not None:
+            for val in values:
+                on_value(timestamp_ns, val)
+    return records, size, count, decode_time
+
+
+def main():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from ScaleDecoder import ScaleDecoder, frame_from_spec, profile_from_spec
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_replay = sub.add_parser("replay", help="將錄製檔餵給解碼器")
+    p_replay.add_argument("path")
+    p_replay.add_argument("--speed", type=float, default=0.0, help="播放倍速，0 為全速")
+    p_replay.add_argument("--frame", help="資料框格式（同 WEIGHTSTATION_SERIAL_FRAME）")
+    p_replay.add_argument("--profile", help="解析方式（同 WEIGHTSTATION_SERIAL_PROFILE）")
+    p_replay.add_argument("--verbose", action="store_true", help="逐筆輸出解析出的讀數")
+    p_raw = sub.add_parser("raw", help="輸出不含表頭的原始位元組")
+    p_raw.add_argument("path")
+    p_raw.add_argument("output")
+    args = parser.parse_args()
+
+    if args.command == "raw":
+        with open(args.output, "wb") as out:
+            for _, data in read_capture(args.path):
+                out.write(data)
+        return
+
+    def show(timestamp_ns, val):
+        stamp = time.strftime("%H:%M:%S", time.localtime(timestamp_ns / 1e9))
+        print(f"{stamp}.{timestamp_ns // 1_000_000 % 1000:03d}  {val}")
+
+    decoder = ScaleDecoder(
+        frame_from_spec(args.frame or os.environ.get("WEIGHTSTATION_SERIAL_FRAME")),
+        profile_from_spec(args.profile or os.environ.get("WEIGHTSTATION_SERIAL_PROFILE")),
+    )
+    records, size, count, decode_time = replay(args.path, decoder, args.speed, show if args.verbose else None)
+    print(f"記錄 {records:,} 筆，{size:,} bytes，解析出 {count:,} 筆讀數")
+    if decode_time > 0:
+        print(f"解碼耗時 {decode_time * 1000:.1f} ms（{size / decode_time / 1e6:.2f} MB/s）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+import re
+
+# 磅秤以帶奇偶校驗位的 RS232 傳輸，每個位元組需先移除最高位（奇偶校驗位）
+# 例如：0xb8 (10111000) & 0x7F = 0x38 ('8')
+PARITY_TABLE = bytes(b & 0x7F for b in range(256))
+
+# 數值字元（數字、正負號、小數點）以外的位元組，以 bytes.translate 一次刪除
+NUMERIC_BYTES = b"0123456789+-."
+NON_NUMERIC_BYTES = bytes(b for b in range(256) if b not in NUMERIC_BYTES)
+
+STX = b"\x02"
+ETX = b"\x03"
+
+
+class DelimitedFrame:
+    """
+    以結束字元分隔的資料框（CR/LF 文字行、STX...ETX）
+
+    start 為 None 時，上一個結束字元之後到下一個結束字元之前即為一框；
+    指定 start 時，start 之前的位元組視為雜訊丟棄。
+    """
+
+    def __init__(self, end=b"\n", start=None):
+        self.end = end
+        self.start = start
+
+    def extract(self, buffer, scanned=0):
+        """
+        從 buffer 取出完整的資料框，回傳 (frames, 已處理的位元組數)
+
+        scanned 為上次已確認沒有結束字元的長度，結束字元只從該處之後開始尋找。
+        """
+        frames = []
+        pos = 0
+        while True:
+            begin = pos
+            if self.start is not None:
+                begin = buffer.find(self.start, pos)
+                if begin < 0:
+                    # 找不到起始字元：整段都是雜訊
+                    return frames, len(buffer)
+                begin += len(self.start)
+            stop = buffer.find(self.end, max(begin, scanned - len(self.end) + 1))
+            scanned = 0
+            if stop < 0:
+                # 不完整的資料框留待下次讀取
+                return frames, (begin - len(self.start)) if self.start is not None else pos
+            frames.append(buffer[begin:stop])
+            pos = stop + len(self.end)
+
+
+class FixedWidthFrame:
+    """
+    固定長度的資料框
+
+    指定 sync 時，每框從 sync 位元組之後開始取 width 個位元組；
+    未指定時，資料流依 width 位元組依序切割。
+    """
+
+    def __init__(self, width, sync=None):
+        self.width = width
+        self.sync = sync
+
+    def extract(self, buffer, scanned=0):
+        """從 buffer 取出完整的資料框，回傳 (frames, 已處理的位元組數)"""
+        frames = []
+        pos = 0
+        while True:
+            begin = pos
+            if self.sync is not None:
+                begin = buffer.find(self.sync, pos)
+                if begin < 0:
+                    return frames, len(buffer)
+                begin += len(self.sync)
+            if len(buffer) - begin < self.width:
+                return frames, (begin - len(self.sync)) if self.sync is not None else pos
+            frames.append(buffer[begin:begin + self.width])
+            pos = begin + self.width
+
+
+# 常見指示器的資料框格式（WEIGHTSTATION_SERIAL_FRAME 環境變數選用）
+FRAME_FORMATS = {
+    "lf": DelimitedFrame(end=b"\n"),
+    "crlf": DelimitedFrame(end=b"\r\n"),
+    "cr": DelimitedFrame(end=b"\r"),
+    "stx_etx": DelimitedFrame(start=STX, end=ETX),
+}
+
+
+def frame_from_spec(spec):
+    """
+    依設定字串取得資料框格式
+
+    可用 FRAME_FORMATS 的名稱，或 "fixed:<寬度>"、"stx_fixed:<寬度>"；
+    未設定時為以換行分隔的文字行（原本的讀取方式）。
+    """
+    spec = (spec or "lf").strip().lower()
+    if spec in FRAME_FORMATS:
+        return FRAME_FORMATS[spec]
+    name, _, width = spec.partition(":")
+    if name in ("fixed", "stx_fixed") and width.isdigit() and int(width) > 0:
+        return FixedWidthFrame(int(width), sync=STX if name == "stx_fixed" else None)
+    raise ValueError(f"不支援的資料框格式: {spec}")
+
+
+# parse_value 使用的預編譯正規表示式
+_NON_NUMERIC_TEXT = re.compile(r'[^\d+\-. \n\r]')
+_LONG_NUMBER = re.compile(r'[\s+]?([+-]?\d{4,10})(?:[^\d]|$)')
+_SIX_DIGITS = re.compile(r'[\s]?([+-]?\d{6})(?:[^\d]|$)')
+_NUMBER_TOKENS = re.compile(r'[-+]?\d{1,10}(?:\.\d+)?')
+
+
+def _parse_numeric_text(cleaned_text):
+    """parse_value 的多重策略（輸入只含數字、正負號、小數點與空白）"""
+    # 策略1：先嘗試匹配較長的連續數字（最多10位）
+    long_match = _LONG_NUMBER.search(cleaned_text)
+    if long_match:
+        val = float(long_match.group(1))
+        if val < 1000000:
+            return val
+
+    # 策略2：匹配標準 6 位數字格式
+    match_6digits = _SIX_DIGITS.search(cleaned_text)
+    if match_6digits:
+        return float(match_6digits.group(1))
+
+    # 策略3：找出所有數字片段並智能組合
+    matches = _NUMBER_TOKENS.findall(cleaned_text)
+    if not matches:
+        return None
+    if len(matches) == 1:
+        return float(matches[0])
+
+    # 嘗試組合相鄰數字
+    combined = ''.join(m.lstrip('+') for m in matches if m.replace('+', '').replace('-', '').replace('.', '').isdigit())
+    try:
+        combined_val = float(combined)
+        if combined_val < 1000000:
+            return combined_val
+    except ValueError:
+        pass
+
+    values = [float(m) for m in matches]
+    non_zero_values = [v for v in values if v != 0.0]
+    if non_zero_values:
+        return max(non_zero_values)
+    return values[-1]
+
+
+def parse_value(text):
+    """從文本中提取數值，支持多種數字格式"""
+    # 預處理：移除數字與符號以外的字符，"006\xb830" 會變成 "006830"
+    return _parse_numeric_text(_NON_NUMERIC_TEXT.sub('', text))
+
+
+class HeuristicProfile:
+    """
+    不知道指示器格式時使用：移除非數值位元組後依 parse_value 的多重策略判斷
+
+    能處理大部分格式，但狀態位元組含數字或有小數點時可能誤判。
+    """
+
+    name = "auto"
+
+    def parse(self, frame):
+        cleaned = frame.translate(None, NON_NUMERIC_BYTES)
+        if not cleaned.translate(None, b"+-."):
+            return None
+        return _parse_numeric_text(cleaned.decode("ascii"))
+
+
+class RegexProfile:
+    """以一個預編譯的 bytes 正規表示式取出重量（第一個群組），空白會被移除"""
+
+    def __init__(self, name, pattern):
+        self.name = name
+        self.pattern = re.compile(pattern)
+
+    def parse(self, frame):
+        match = self.pattern.search(frame)
+        if match is None:
+            return None
+        try:
+            return float(match.group(1).replace(b" ", b""))
+        except ValueError:
+            return None
+
+
+class SliceProfile:
+    """固定欄位位置的重量（例如 Toledo 連續輸出：3 個狀態位元組後的 6 位數）"""
+
+    def __init__(self, name, start, end, decimals=0):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.divisor = 10 ** decimals  # 指示器省略小數點時的位數
+
+    def parse(self, frame):
+        try:
+            return float(frame[self.start:self.end].replace(b" ", b"")) / self.divisor
+        except ValueError:
+            return None
+
+
+# 常見指示器的解析方式（WEIGHTSTATION_SERIAL_PROFILE 環境變數選用，啟動時決定）
+PARSE_PROFILES = {
+    "auto": HeuristicProfile(),
+    # "ST,GS,+006830kg"、STX "+012345" ETX 等：第一個帶正負號的數值（可含小數）
+    "signed": RegexProfile("signed", rb"([+-]? *\d+(?:\.\d+)?)"),
+    # Mettler Toledo 連續輸出（搭配 stx_fixed:15）：SWA SWB SWC + 6 位重量 + 6 位皮重
+    "toledo": SliceProfile("toledo", 3, 9),
+}
+
+
+def profile_from_spec(spec):
+    """
+    依設定字串取得解析方式
+
+    可用 PARSE_PROFILES 的名稱，或 "slice:<起>:<迄>[:<小數位數>]"；未設定時為 auto。
+    """
+    spec = (spec or "auto").strip()
+    if spec in PARSE_PROFILES:
+        return PARSE_PROFILES[spec]
+    parts = spec.split(":")
+    if parts[0] == "slice" and len(parts) in (3, 4) and all(p.isdigit() for p in parts[1:]):
+        start, end = int(parts[1]), int(parts[2])
+        decimals = int(parts[3]) if len(parts) == 4 else 0
+        if start < end:
+            return SliceProfile(spec, start, end, decimals)
+    raise ValueError(f"不支援的解析方式: {spec}")
+
+
+class RingBuffer:
+    """
+    固定大小的位元組環形緩衝區
+
+    寫入時只複製新進的位元組，消耗資料框只移動起點，不搬移剩餘內容；
+    find 直接在底層 bytearray 上以範圍搜尋（含跨越尾端的情況），
+    索引與切片皆以目前第一個未處理的位元組為 0，切片回傳該段的 bytes。
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def free(self):
+        return self.capacity - self._size
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+
+    def write(self, data):
+        """寫入 data（bytes 或 memoryview），空間不足時只寫入能容納的部分，回傳寫入的位元組數"""
+        n = min(len(data), self.capacity - self._size)
+        end = (self._start + self._size) % self.capacity
+        first = min(n, self.capacity - end)
+        self._view[end:end + first] = data[:first]
+        if n > first:
+            self._view[:n - first] = data[first:n]
+        self._size += n
+        return n
+
+    def consume(self, n):
+        """丟棄最前面的 n 個位元組"""
+        n = min(n, self._size)
+        self._size -= n
+        self._start = (self._start + n) % self.capacity if self._size else 0
+
+    def find(self, sub, start=0, end=None):
+        """在 [start, end) 範圍內尋找 sub，回傳相對位置，找不到時回傳 -1"""
+        end = self._size if end is None else min(end, self._size)
+        if start >= end:
+            return -1
+        cap = self.capacity
+        a = self._start + start
+        b = self._start + end
+        if b <= cap:
+            i = self._buf.find(sub, a, b)
+            return i - self._start if i >= 0 else -1
+        if a < cap:
+            i = self._buf.find(sub, a, cap)
+            if i >= 0:
+                return i - self._start
+            # 跨越緩衝區尾端的多位元組分隔字元
+            k = len(sub) - 1
+            if k:
+                lo = max(a, cap - k)
+                joined = bytes(self._view[lo:cap]) + bytes(self._view[:min(b - cap, k)])
+                j = joined.find(sub)
+                if j >= 0:
+                    return lo + j - self._start
+            a = cap
+        i = self._buf.find(sub, a - cap, b - cap)
+        return i + cap - self._start if i >= 0 else -1
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("RingBuffer 只支援切片")
+        start, stop, _ = key.indices(self._size)
+        if stop <= start:
+            return b""
+        cap = self.capacity
+        a = self._start + start
+        b = self._start + stop
+        if b <= cap:
+            return bytes(self._view[a:b])
+        if a >= cap:
+            return bytes(self._view[a - cap:b - cap])
+        return bytes(self._view[a:cap]) + bytes(self._view[:b - cap])
+
+
+class ScaleDecoder:
+    """
+    磅秤資料流解碼器：奇偶校驗位移除 → 資料框切割 → 依 profile 解析數值
+
+    不依賴序列埠或 Tk，可直接以錄製的位元組資料驗證：
+        ScaleDecoder(frame_from_spec("stx_etx"), profile_from_spec("signed")).feed(recorded_bytes)
+    指定 stats（ScaleTelemetry）時累加讀取位元組、資料框、解析失敗與溢位丟棄的位元組數。
+    """
+
+    def __init__(self, frame=None, profile=None, capacity=4096, keep_on_overflow=100, stats=None):
+        self.stats = stats
+        self.frame = frame if frame is not None else FRAME_FORMATS["lf"]
+        self.profile = profile if profile is not None else PARSE_PROFILES["auto"]
+        self._parse = self.profile.parse
+        self.keep_on_overflow = keep_on_overflow
+        self._ring = RingBuffer(capacity)
+        self._scanned = 0  # 緩衝區中已確認沒有完整資料框的長度
+
+    def reset(self):
+        """丟棄尚未組成完整資料框的位元組"""
+        self._ring.clear()
+        self._scanned = 0
+
+    def decode_frame(self, frame):
+        """解析單一資料框（已移除奇偶校驗位），無法解析時回傳 None"""
+        return self._parse(frame)
+
+    def feed(self, data):
+        """加入新讀到的位元組，回傳其中完整資料框解析出的數值（依序）"""
+        ring = self._ring
+        stats = self.stats
+        view = memoryview(data.translate(PARITY_TABLE))
+        values = []
+        while view:
+            if not ring.free:
+                # 緩衝區已滿仍沒有完整資料框（一直收不到結束字元）：只保留最後一段
+                discarded = len(ring) - self.keep_on_overflow
+                ring.consume(discarded)
+                self._scanned = min(self._scanned, len(ring))
+                if stats is not None:
+                    stats.bytes_discarded += discarded
+            written = ring.write(view)
+            view = view[written:]
+
+            frames, consumed = self.frame.extract(ring, self._scanned)
+            ring.consume(consumed)
+            self._scanned = len(ring)
+            parse = self._parse
+            found = len(values)
+            for frame in frames:
+                val = parse(frame)
+                if val is not None:
+                    values.append(val)
+            if stats is not None:
+                stats.frames += len(frames)
+                stats.parse_failures += len(frames) - (len(values) - found)
+        if stats is not None:
+            stats.bytes_read += len(data)
+        return values
+
+
+def decode_stream(data, frame=None, profile=None):
+    """解碼一段完整的錄製資料，回傳所有解析出的數值"""
+    return ScaleDecoder(frame, profile).feed(data)
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import deque
+
+
+class ValueMailbox:
+    """
+    讀取執行緒與 Tk 之間的最新值信箱
+
+    讀取端每解析出一筆就呼叫 put，只保留最新的一筆；
+    Tk 端以固定頻率呼叫 take 取值顯示，兩次 take 之間被覆蓋的讀數計為 dropped，
+    不會為每一筆讀數在 Tk 事件佇列排入回呼。
+    """
+
+    def __init__(self, initial=0.0):
+        self._lock = threading.Lock()
+        self._value = initial
+        self._arrived = None
+        self._fresh = False
+        self.frames = 0  # 累計收到的讀數
+        self.dropped = 0  # 未顯示就被較新讀數覆蓋的讀數
+        self._rate = 0.0
+        self._rate_frames = 0
+        self._rate_time = time.monotonic()
+
+    def put(self, value, arrived=None):
+        """由讀取執行緒呼叫：存入最新讀數，arrived 為讀到該資料框的 time.perf_counter()"""
+        with self._lock:
+            if self._fresh:
+                self.dropped += 1
+            self._value = value
+            self._arrived = arrived
+            self._fresh = True
+            self.frames += 1
+
+    def take(self):
+        """由 Tk 端呼叫：取出上次之後的最新讀數，沒有新讀數時回傳 None"""
+        taken = self.take_timed()
+        return taken[0] if taken is not None else None
+
+    def take_timed(self):
+        """同 take，但回傳 (讀數, 讀到的時間)，用於計算顯示延遲"""
+        with self._lock:
+            if not self._fresh:
+                return None
+            self._fresh = False
+            return self._value, self._arrived
+
+    def latest(self):
+        """目前最新的讀數（不論是否已取出）"""
+        with self._lock:
+            return self._value
+
+    def read_rate(self, window=1.0):
+        """每秒讀數，約每 window 秒更新一次"""
+        now = time.monotonic()
+        elapsed = now - self._rate_time
+        if elapsed >= window:
+            frames = self.frames
+            self._rate = (frames - self._rate_frames) / elapsed
+            self._rate_frames = frames
+            self._rate_time = now
+        return self._rate
+
+
+class StabilityDetector:
+    """
+    磅秤讀數穩定判斷
+
+    最近 window 筆讀數的最大最小差不超過 tolerance，且這個狀態持續 min_duration 秒以上，
+    即視為穩定，stable_value 為這幾筆的平均值；車輛仍在移動時 stable_value 為 None。
+    """
+
+    def __init__(self, window=5, tolerance=20.0, min_duration=1.0):
+        self.window = window
+        self.tolerance = tolerance
+        self.min_duration = min_duration
+        self.stable_value = None
+        self._samples = deque(maxlen=window)
+        self._settled_since = None
+
+    @property
+    def stable_since(self):
+        """目前這段穩定狀態開始的時間（time.monotonic），未穩定時為 None"""
+        return self._settled_since if self.stable_value is not None else None
+
+    def reset(self):
+        self._samples.clear()
+        self._settled_since = None
+        self.stable_value = None
+
+    def update(self, value, now=None):
+        """加入一筆讀數，回傳目前是否穩定"""
+        now = time.monotonic() if now is None else now
+        samples = self._samples
+        samples.append(value)
+        if len(samples) < self.window or max(samples) - min(samples) > self.tolerance:
+            self._settled_since = None
+            self.stable_value = None
+            return False
+        if self._settled_since is None:
+            self._settled_since = now
+        if now - self._settled_since < self.min_duration:
+            self.stable_value = None
+            return False
+        self.stable_value = sum(samples) / len(samples)
+        return True
@@ -0,0 +1,320 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+from ScaleCapture import CaptureWriter, capture_path
+from ScaleDecoder import ScaleDecoder, frame_from_spec, profile_from_spec
+from ScaleReading import StabilityDetector, ValueMailbox
+from ScaleTelemetry import ScaleTelemetry
+from ScaleTransport import ScaleLoop, open_serial_stream
+
+log = logging.getLogger(__name__)
+
+
+# 未設定多台磅秤時唯一一台磅秤所屬的車道
+DEFAULT_LANE = "default"
+
+# 多台磅秤設定檔（不存在時依 WEIGHTSTATION_SERIAL_* 環境變數只使用一台）
+SCALES_CONFIG = "scales.json"
+
+# 讀數由正值突然變成 0 時，連續收到這麼多筆 0 或持續這麼多秒才採用（單獨一筆 0 多半是資料分割錯誤）
+ZERO_CONFIRM_FRAMES = 3
+ZERO_CONFIRM_SECONDS = 0.5
+
+
+def _stability_from_environment(config=None):
+    """穩定判斷參數：設定檔的值優先，其次為 WEIGHTSTATION_STABLE_* 環境變數"""
+    config = config or {}
+    return StabilityDetector(
+        window=int(config.get("stable_window", os.environ.get("WEIGHTSTATION_STABLE_WINDOW", "5"))),
+        tolerance=float(config.get("stable_tolerance", os.environ.get("WEIGHTSTATION_STABLE_TOLERANCE", "20"))),
+        min_duration=float(config.get("stable_duration", os.environ.get("WEIGHTSTATION_STABLE_DURATION", "1.0"))),
+    )
+
+
+class ScaleService:
+    """
+    常駐的磅秤讀取服務
+
+    程式啟動時開啟序列埠並在 ScaleLoop 的事件迴圈上持續讀取，連線中斷或開啟失敗時每隔
+    reconnect_delay 秒自動重試；最新讀數發佈在 mailbox，RS232 視窗開啟時即可顯示，
+    不需要每次重新列舉與開啟序列埠。
+    讀數同時送進 stability 判斷，stable_weight 為目前的穩定重量（車輛移動中為 None），
+    stable_since 為這段穩定狀態開始的時間（time.monotonic）。
+    on_reading(value) 若有指定，會在事件迴圈執行緒中對每筆讀數呼叫。
+    指定 capture_dir 時，讀到的原始位元組會錄製到該目錄的 .wscap 檔（見 ScaleCapture）。
+    """
+
+    def __init__(self, port=None, baud=9600, frame=None, stability=None, reconnect_delay=2.0, on_reading=None,
+                 name="磅秤", lane=DEFAULT_LANE, capture_dir=None, profile=None):
+        self.name = name
+        self.lane = lane
+        self.port = port  # None 表示自動選擇第一個可用的序列埠
+        self.baud = baud
+        self.frame = frame
+        self.profile = profile
+        self.reconnect_delay = reconnect_delay
+        self.on_reading = on_reading
+        self.capture_dir = capture_dir
+        self.capture = None
+        self.mailbox = ValueMailbox()
+        self.telemetry = ScaleTelemetry()
+        self.stability = stability if stability is not None else StabilityDetector()
+        self.stable_weight = None
+        self.stable_since = None
+        self.connected = False
+        self.available = True  # 是否已安裝 pyserial
+        self.status = "未啟動"
+        self.active_port = None
+        self._stop_event = threading.Event()
+        self._loop = None
+        self._own_loop = False
+        self._future = None
+        self._stream = None
+
+    @classmethod
+    def from_environment(cls):
+        """
+        依環境變數建立服務
+
+        WEIGHTSTATION_SERIAL_PORT / _BAUD / _FRAME / _PROFILE：序列埠、鮑率、資料框格式與解析方式
+        WEIGHTSTATION_STABLE_WINDOW / _TOLERANCE / _DURATION：穩定判斷的筆數、容許誤差與持續秒數
+        WEIGHTSTATION_CAPTURE_DIR：設定時錄製原始資料
+        """
+        return cls(
+            port=os.environ.get("WEIGHTSTATION_SERIAL_PORT"),
+            baud=int(os.environ.get("WEIGHTSTATION_SERIAL_BAUD", "9600")),
+            frame=frame_from_spec(os.environ.get("WEIGHTSTATION_SERIAL_FRAME")),
+            profile=profile_from_spec(os.environ.get("WEIGHTSTATION_SERIAL_PROFILE")),
+            stability=_stability_from_environment(),
+            capture_dir=os.environ.get("WEIGHTSTATION_CAPTURE_DIR"),
+        )
+
+    @classmethod
+    def from_config(cls, config):
+        """依設定檔中的一台磅秤設定建立服務（port 必填）"""
+        if not config.get("port"):
+            raise ValueError(f"磅秤設定缺少 port: {config}")
+        return cls(
+            port=config["port"],
+            baud=int(config.get("baud", 9600)),
+            frame=frame_from_spec(config.get("frame")),
+            profile=profile_from_spec(config.get("profile")),
+            stability=_stability_from_environment(config),
+            name=config.get("name") or config["port"],
+            lane=config.get("lane", DEFAULT_LANE),
+            capture_dir=config.get("capture_dir", os.environ.get("WEIGHTSTATION_CAPTURE_DIR")),
+        )
+
+    def start(self, scale_loop=None):
+        """開始讀取；未指定 scale_loop 時自行建立一個事件迴圈"""
+        if self._future is not None and not self._future.done():
+            return
+        if scale_loop is None:
+            scale_loop = ScaleLoop()
+            self._own_loop = True
+        self._loop = scale_loop
+        self._stop_event.clear()
+        self._future = scale_loop.submit(self._run())
+
+    def stop(self, timeout=1.0):
+        """停止讀取並關閉序列埠（最多等待 timeout 秒）"""
+        self._stop_event.set()
+        if self._future is not None:
+            self._future.cancel()
+            try:
+                self._future.result(timeout=timeout)
+            except BaseException:
+                pass
+            self._future = None
+        if self._own_loop:
+            self._loop.stop(timeout=timeout)
+            self._own_loop = False
+
+    def current_weight(self):
+        """目前最新的讀數"""
+        return self.mailbox.latest()
+
+    def _select_port(self):
+        from serial.tools import list_ports
+
+        ports = [p.device for p in list_ports.comports()]
+        if not ports:
+            raise OSError("找不到可用的序列埠，請確認 RS232 設備已連接")
+        log.info("自動選擇序列埠: %s", ports[0])
+        return ports[0]
+
+    async def _run(self):
+        try:
+            import serial  # noqa: F401
+        except ImportError:
+            self.available = False
+            self.status = "未安裝 pyserial，無法讀取 RS232"
+            log.warning("%s", self.status)
+            return
+
+        if self.capture_dir:
+            try:
+                os.makedirs(self.capture_dir, exist_ok=True)
+                self.capture = CaptureWriter(capture_path(self.capture_dir, self.lane))
+                log.info("錄製%s原始資料: %s", self.name, self.capture.path)
+            except OSError as e:
+                log.error("無法建立錄製檔: %s", e)
+        try:
+            await self._connect_loop()
+        finally:
+            if self.capture is not None:
+                self.capture.close()
+                self.capture = None
+
+    async def _connect_loop(self):
+        loop = asyncio.get_running_loop()
+        while not self._stop_event.is_set():
+            try:
+                port = self.port or await loop.run_in_executor(None, self._select_port)
+                self.active_port = port
+                self._stream = await open_serial_stream(port, self.baud)
+            except Exception as e:
+                self.status = f"無法開啟序列埠：{e}"
+                self.telemetry.record_error(self.status)
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            self.connected = True
+            self.status = f"已連線：{self.active_port} @ {self.baud}"
+            log.info("%s%s", self.name, self.status)
+            try:
+                await self._read_loop(self._stream)
+            except ConnectionError as e:
+                if not self._stop_event.is_set():
+                    log.warning("RS232 讀取錯誤（%s）: %s", self.name, e)
+                    self.status = f"連線中斷，重新連線中：{e}"
+                    self.telemetry.record_error(str(e))
+            except Exception as e:
+                # 解碼或 on_reading 等程式錯誤也不能讓讀取服務靜默結束：記錄後照常重新連線
+                log.exception("%s讀取時發生未預期的錯誤", self.name)
+                self.status = f"讀取錯誤，重新連線中：{e}"
+                self.telemetry.record_error(self.status)
+            finally:
+                self.connected = False
+                self.stability.reset()
+                self.stable_weight = None
+                self.stable_since = None
+                self._stream.close()
+                self._stream = None
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _write_capture(self, data):
+        """寫入錄製檔；寫入失敗（磁碟已滿、檔案被移除等）時停止錄製，不影響讀取"""
+        try:
+            self.capture.write(data)
+        except OSError as e:
+            log.error("%s錄製檔寫入失敗，停止錄製（%s）: %s", self.name, self.capture.path, e)
+            self.telemetry.record_error(f"錄製失敗：{e}")
+            try:
+                self.capture.close()
+            except OSError:
+                pass
+            self.capture = None
+
+    async def _read_loop(self, stream):
+        decoder = ScaleDecoder(self.frame, self.profile, stats=self.telemetry)
+        last_valid_value = None
+        zero_run = 0
+        zero_since = None
+
+        while not self._stop_event.is_set():
+            data = await stream.read()
+            arrived = time.perf_counter()
+            if self.capture is not None:
+                self._write_capture(data)
+            for val in decoder.feed(data):
+                # 穩定判斷使用每一筆讀數（包含暫不採用的 0），車輛離開後 stable_weight 隨即清除
+                self.stability.update(val)
+                self.stable_weight = self.stability.stable_value
+                self.stable_since = self.stability.stable_since
+                # 過濾明顯錯誤的讀數：有效值 > 0 時突然變成 0，可能是數據分割錯誤；
+                # 連續 ZERO_CONFIRM_FRAMES 筆或持續 ZERO_CONFIRM_SECONDS 秒都是 0 才視為秤台歸零
+                if val == 0.0 and last_valid_value is not None and last_valid_value > 0.0:
+                    zero_run += 1
+                    if zero_since is None:
+                        zero_since = arrived
+                    if zero_run < ZERO_CONFIRM_FRAMES and arrived - zero_since < ZERO_CONFIRM_SECONDS:
+                        continue
+                zero_run = 0
+                zero_since = None
+                self.mailbox.put(val, arrived)
+                last_valid_value = val
+                if self.on_reading is not None:
+                    self.on_reading(val)
+
+
+class ScaleRegistry:
+    """
+    多台磅秤（每個車道一台）的集合，所有磅秤共用同一個 ScaleLoop
+
+    routes 將欄位對應到車道，例如進場車道量重車、出場車道量空車：
+        {"heavy": "in", "empty": "out"}
+    欄位沒有對應或該車道沒有磅秤時，使用第一台磅秤。
+    """
+
+    def __init__(self, services, routes=None):
+        self.services = list(services)
+        self.routes = dict(routes or {})
+        self._by_lane = {}
+        for service in self.services:
+            if service.lane in self._by_lane:
+                raise ValueError(f"車道 {service.lane} 設定了兩台磅秤")
+            self._by_lane[service.lane] = service
+        self._loop = None
+
+    @classmethod
+    def from_environment(cls):
+        """
+        讀取 WEIGHTSTATION_SCALES_CONFIG（預設 scales.json）設定多台磅秤：
+            {"scales": [{"name": "進場", "lane": "in", "port": "COM3", "baud": 9600, "frame": "lf", "profile": "signed"}, ...],
+             "routes": {"heavy": "in", "empty": "out"}}
+        設定檔不存在時只使用一台以 WEIGHTSTATION_SERIAL_* 環境變數設定的磅秤。
+        """
+        path = os.environ.get("WEIGHTSTATION_SCALES_CONFIG", SCALES_CONFIG)
+        if not os.path.exists(path):
+            return cls([ScaleService.from_environment()])
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        scales = config.get("scales") or []
+        if not scales:
+            raise ValueError(f"{path} 沒有設定任何磅秤")
+        return cls([ScaleService.from_config(c) for c in scales], config.get("routes"))
+
+    def __iter__(self):
+        return iter(self.services)
+
+    def __len__(self):
+        return len(self.services)
+
+    def for_lane(self, lane):
+        return self._by_lane.get(lane)
+
+    def for_field(self, field_key):
+        """回傳負責該欄位（heavy / empty）讀值的磅秤"""
+        service = self._by_lane.get(self.routes.get(field_key))
+        if service is None and self.services:
+            service = self.services[0]
+        return service
+
+    def start(self):
+        """在同一個事件迴圈上啟動所有磅秤"""
+        if self._loop is None:
+            self._loop = ScaleLoop()
+        for service in self.services:
+            service.start(self._loop)
+
+    def stop(self, timeout=1.0):
+        for service in self.services:
+            service.stop(timeout=timeout)
+        if self._loop is not None:
+            self._loop.stop(timeout=timeout)
+            self._loop = None
@@ -0,0 +1,189 @@
+"""
+磅秤模擬器：以 pty 虛擬序列埠依重量曲線持續送出讀數（僅 POSIX）
+
+用法：
+    python ScaleSimulator.py [--profile truck:15000] [--rate 20] [--frame lf] [--no-parity]
+
+啟動後會印出虛擬序列埠路徑，設定 WEIGHTSTATION_SERIAL_PORT=<路徑> 再執行 main.py 即可不接實機測試。
+重量曲線：
+    truck:<重量>      空磅 → 上磅 → 晃動 → 穩定 → 下磅，重複循環
+    constant:<重量>   固定重量（含少量雜訊）
+    counter           每框遞增 1（量測延遲用）
+    file:<路徑>       逐行讀取重量，播完後從頭重複
+"""
+import argparse
+import os
+import random
+import threading
+import time
+
+# 7E1 傳輸：在最高位加上偶同位位元
+EVEN_PARITY_TABLE = bytes(b | 0x80 if bin(b).count("1") % 2 else b for b in range(256))
+
+
+def encode_frame(weight, frame="lf"):
+    """依資料框格式產生一筆指示器輸出"""
+    weight = int(round(weight))
+    if frame == "stx_etx":
+        return b"\x02%+07d\x03" % weight
+    if frame == "cr":
+        return b"ST,GS,%+07dkg\r" % weight
+    return b"ST,GS,%+07dkg\r\n" % weight
+
+
+def truck_profile(rate, weight, idle=3.0, approach=3.0, settle=1.5, hold=6.0, leave=3.0, noise=5, seed=None):
+    """車輛上下磅的重量曲線（無限循環）"""
+    rng = random.Random(seed)
+    while True:
+        for _ in range(int(idle * rate)):
+            yield 0
+        steps = max(1, int(approach * rate))
+        for i in range(steps):
+            yield weight * (i + 1) / steps + rng.uniform(-noise, noise) * 20
+        steps = max(1, int(settle * rate))
+        for i in range(steps):
+            # 阻尼振盪：剛停車時的晃動
+            yield weight + weight * 0.02 * (1 - i / steps) * (1 if i % 2 else -1)
+        for _ in range(int(hold * rate)):
+            yield weight + rng.uniform(-noise, noise)
+        steps = max(1, int(leave * rate))
+        for i in range(steps):
+            yield weight * (1 - (i + 1) / steps)
+
+
+def constant_profile(rate, weight, noise=2, seed=None):
+    rng = random.Random(seed)
+    while True:
+        yield weight + rng.uniform(-noise, noise)
+
+
+def counter_profile(rate):
+    n = 0
+    while True:
+        n = n % 999999 + 1
+        yield n
+
+
+def file_profile(rate, path):
+    with open(path, encoding="utf-8") as f:
+        weights = [float(line) for line in f if line.strip()]
+    if not weights:
+        raise ValueError(f"重量檔沒有資料: {path}")
+    while True:
+        yield from weights
+
+
+def profile_from_spec(spec, rate, seed=None):
+    """依設定字串建立重量曲線產生器"""
+    name, _, arg = (spec or "truck:15000").partition(":")
+    if name == "truck":
+        return truck_profile(rate, float(arg or 15000), seed=seed)
+    if name == "constant":
+        return constant_profile(rate, float(arg or 0), seed=seed)
+    if name == "counter":
+        return counter_profile(rate)
+    if name == "file":
+        return file_profile(rate, arg)
+    raise ValueError(f"不支援的重量曲線: {spec}")
+
+
+class ScaleSimulator:
+    """
+    以 pty 模擬的磅秤
+
+    start() 後 port 為虛擬序列埠（slave 端）路徑；背景執行緒依 rate 每秒送出的框數
+    寫入 master 端。沒有程式讀取時，超出 pty 緩衝的輸出會被丟棄（與實機持續發送一致）。
+    on_sent(weight, timestamp) 若有指定，每送出一框呼叫一次。
+    """
+
+    def __init__(self, profile, rate=20.0, frame="lf", parity=True, on_sent=None):
+        self.profile = profile
+        self.rate = rate
+        self.frame = frame
+        self.parity = parity
+        self.on_sent = on_sent
+        self.port = None
+        self.sent = 0
+        self._master = None
+        self._slave = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        import pty
+        import tty
+
+        self._master, self._slave = pty.openpty()
+        # 關閉行規則（回顯、CR/LF 轉換），讓位元組原樣傳到讀取端
+        tty.setraw(self._slave)
+        os.set_blocking(self._master, False)
+        self.port = os.ttyname(self._slave)
+        self._thread = threading.Thread(target=self._run, name="ScaleSimulator", daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._master = self._slave = None
+
+    def _run(self):
+        interval = 1.0 / self.rate
+        next_time = time.perf_counter()
+        for weight in self.profile:
+            if self._stop_event.is_set():
+                return
+            data = encode_frame(weight, self.frame)
+            if self.parity:
+                data = data.translate(EVEN_PARITY_TABLE)
+            try:
+                os.write(self._master, data)
+            except BlockingIOError:
+                pass
+            except OSError:
+                return
+            self.sent += 1
+            if self.on_sent is not None:
+                self.on_sent(weight, time.perf_counter())
+            next_time += interval
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                self._stop_event.wait(delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", default="truck:15000")
+    parser.add_argument("--rate", type=float, default=20.0, help="每秒送出的框數")
+    parser.add_argument("--frame", default="lf", choices=("lf", "crlf", "cr", "stx_etx"))
+    parser.add_argument("--no-parity", action="store_true", help="不加偶同位位元")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    simulator = ScaleSimulator(
+        profile_from_spec(args.profile, args.rate, args.seed),
+        rate=args.rate,
+        frame=args.frame,
+        parity=not args.no_parity,
+    )
+    port = simulator.start()
+    print(f"✓ 模擬磅秤已啟動: {port}（{args.profile}，{args.rate:g} 框/秒）")
+    print(f"  WEIGHTSTATION_SERIAL_PORT={port} WEIGHTSTATION_SERIAL_FRAME={args.frame} python main.py")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
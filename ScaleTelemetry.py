@@ -0,0 +1,147 @@
+import json
+import time
+from bisect import bisect_left
+from collections import deque
+
+# 延遲直方圖的區間上限（毫秒），最後一格為超過 1000 ms
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class LatencyHistogram:
+    """只統計最近 window 筆樣本的延遲直方圖（毫秒）"""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS, window=1000):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds):
+        ms = seconds * 1000.0
+        bucket = bisect_left(self.bounds, ms)
+        if len(self._samples) == self._samples.maxlen:
+            self.counts[self._samples[0][1]] -= 1
+        self._samples.append((ms, bucket))
+        self.counts[bucket] += 1
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, fraction):
+        """回傳第 fraction 分位的延遲（毫秒），沒有樣本時回傳 None"""
+        if not self._samples:
+            return None
+        ordered = sorted(ms for ms, _ in self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def buckets(self):
+        """回傳 [(區間標籤, 筆數)]"""
+        labels = [f"<= {b} ms" for b in self.bounds] + [f"> {self.bounds[-1]} ms"]
+        return list(zip(labels, self.counts))
+
+
+class ScaleTelemetry:
+    """
+    一台磅秤的讀取統計
+
+    位元組數、資料框數、解析失敗與緩衝區溢位丟棄的位元組由 ScaleDecoder 累加，
+    讀取錯誤由 ScaleService 記錄，latency 為資料框讀到至顯示在畫面上的時間（由 Tk 端記錄）。
+    """
+
+    def __init__(self, latency_window=1000):
+        self.bytes_read = 0
+        self.bytes_discarded = 0
+        self.frames = 0
+        self.parse_failures = 0
+        self.read_errors = 0
+        self.last_error = None
+        self.latency = LatencyHistogram(window=latency_window)
+        self.started = time.monotonic()
+        self._fps = 0.0
+        self._rate_frames = 0
+        self._rate_time = self.started
+
+    def record_error(self, message):
+        self.read_errors += 1
+        self.last_error = message
+
+    def frames_per_second(self, window=1.0):
+        """每秒資料框數，約每 window 秒更新一次"""
+        now = time.monotonic()
+        elapsed = now - self._rate_time
+        if elapsed >= window:
+            frames = self.frames
+            self._fps = (frames - self._rate_frames) / elapsed
+            self._rate_frames = frames
+            self._rate_time = now
+        return self._fps
+
+    def snapshot(self):
+        return {
+            "uptime_seconds": round(time.monotonic() - self.started, 1),
+            "bytes_read": self.bytes_read,
+            "bytes_discarded": self.bytes_discarded,
+            "frames": self.frames,
+            "frames_per_second": round(self.frames_per_second(), 2),
+            "parse_failures": self.parse_failures,
+            "read_errors": self.read_errors,
+            "last_error": self.last_error,
+            "latency_samples": len(self.latency),
+            "latency_ms": {
+                "p50": self.latency.percentile(0.5),
+                "p95": self.latency.percentile(0.95),
+                "p99": self.latency.percentile(0.99),
+            },
+            "latency_histogram": dict(self.latency.buckets()),
+        }
+
+
+def _service_snapshot(service):
+    data = {
+        "name": service.name,
+        "lane": service.lane,
+        "status": service.status,
+        "connected": service.connected,
+        "readings": service.mailbox.frames,
+        "readings_not_displayed": service.mailbox.dropped,
+    }
+    data.update(service.telemetry.snapshot())
+    return data
+
+
+def format_report(services):
+    """診斷視窗顯示的文字報表"""
+    lines = []
+    for service in services:
+        s = _service_snapshot(service)
+        lat = s["latency_ms"]
+
+        def ms(v):
+            return f"{v:.1f}" if v is not None else "-"
+
+        lines += [
+            f"[{s['name']}]（車道 {s['lane']}）{s['status']}",
+            f"  資料框 {s['frames']:,}（{s['frames_per_second']:.1f} 框/秒）  解析失敗 {s['parse_failures']:,}",
+            f"  讀取 {s['bytes_read']:,} bytes  溢位丟棄 {s['bytes_discarded']:,} bytes  讀取錯誤 {s['read_errors']}",
+            f"  讀數 {s['readings']:,}  未顯示即被取代 {s['readings_not_displayed']:,}",
+            f"  顯示延遲 p50 {ms(lat['p50'])} ms  p95 {ms(lat['p95'])} ms  p99 {ms(lat['p99'])} ms"
+            f"（最近 {s['latency_samples']} 筆）",
+        ]
+        if s["last_error"]:
+            lines.append(f"  最後錯誤：{s['last_error']}")
+        peak = max(s["latency_histogram"].values(), default=0)
+        for label, count in s["latency_histogram"].items():
+            bar = "#" * (round(count * 30 / peak) if peak else 0)
+            lines.append(f"    {label:>10} {count:6d} {bar}")
+        lines.append("")
+    return "\n".join(lines) if lines else "沒有設定磅秤"
+
+
+def dump_telemetry(services, path):
+    """將所有磅秤的統計寫成 JSON 檔，回傳檔案路徑"""
+    report = {
+        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "scales": [_service_snapshot(service) for service in services],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 每次從序列埠讀取的最大位元組數
+READ_CHUNK = 4096
+
+
+class FdSerialStream:
+    """
+    POSIX：以非阻塞 fd 搭配 loop.add_reader 讀取
+
+    不佔用執行緒，同一個事件迴圈可以同時服務多台磅秤。
+    """
+
+    def __init__(self, ser):
+        self.serial = ser
+        self._fd = ser.fileno()
+
+    async def read(self):
+        """回傳下一段讀到的位元組；序列埠關閉或斷線時拋出 ConnectionError"""
+        loop = asyncio.get_running_loop()
+        waited = False
+        while True:
+            try:
+                data = os.read(self._fd, READ_CHUNK)
+            except BlockingIOError:
+                data = None
+            except OSError as e:
+                raise ConnectionError(f"序列埠讀取失敗：{e}") from e
+            if data:
+                return data
+            # VMIN=0 的 tty 沒有資料時 read 回傳空字串；已回報可讀卻讀不到資料表示裝置已斷線
+            if waited and data == b"":
+                raise ConnectionError("序列埠已關閉")
+
+            waited = True
+            readable = loop.create_future()
+            loop.add_reader(self._fd, lambda: readable.done() or readable.set_result(None))
+            try:
+                await readable
+            finally:
+                loop.remove_reader(self._fd)
+
+    def close(self):
+        try:
+            self.serial.close()
+        except Exception:
+            pass
+
+
+class ThreadedSerialStream:
+    """
+    其他平台（Windows 的序列埠沒有可供 add_reader 的 fd）：
+    阻塞讀取交給這個序列埠專用的執行緒，事件迴圈本身不會被卡住。
+    """
+
+    def __init__(self, ser):
+        self.serial = ser
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ScaleRead")
+
+    def _read_blocking(self):
+        ser = self.serial
+        return ser.read(max(1, min(READ_CHUNK, ser.in_waiting or 1)))
+
+    async def read(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                data = await loop.run_in_executor(self._executor, self._read_blocking)
+            except Exception as e:
+                raise ConnectionError(f"序列埠讀取失敗：{e}") from e
+            if data:
+                return data
+            if not self.serial.is_open:
+                raise ConnectionError("序列埠已關閉")
+
+    def close(self):
+        try:
+            self.serial.close()
+        except Exception:
+            pass
+        self._executor.shutdown(wait=False)
+
+
+def _open_serial(port, baud, timeout):
+    import serial
+
+    return serial.Serial(port, baudrate=baud, timeout=timeout)
+
+
+async def open_serial_stream(port, baud):
+    """開啟序列埠（在執行緒中進行，不阻塞其他磅秤），回傳可 await read() 的串流"""
+    loop = asyncio.get_running_loop()
+    if os.name == "posix":
+        ser = await loop.run_in_executor(None, _open_serial, port, baud, 0)
+        return FdSerialStream(ser)
+    ser = await loop.run_in_executor(None, _open_serial, port, baud, 0.2)
+    return ThreadedSerialStream(ser)
+
+
+class ScaleLoop:
+    """
+    在背景執行緒執行的 asyncio 事件迴圈
+
+    所有磅秤的讀取協程都排在這一個迴圈上，不再每台磅秤（或每個視窗）各開一條執行緒。
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="ScaleLoop", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        self.loop.close()
+
+    def submit(self, coro):
+        """從其他執行緒排入協程，回傳 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, func, *args):
+        self.loop.call_soon_threadsafe(func, *args)
+
+    async def _shutdown(self):
+        current = asyncio.current_task()
+        tasks = [t for t in asyncio.all_tasks() if t is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.loop.stop()
+
+    def stop(self, timeout=1.0):
+        """取消所有讀取協程並停止事件迴圈（最多等待 timeout 秒）"""
+        if not self.loop.is_closed():
+            self.submit(self._shutdown())
+        self._thread.join(timeout=timeout)
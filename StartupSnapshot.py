@@ -0,0 +1,83 @@
+"""
+啟動快照：保存客戶/商品目錄與當日交易，下次啟動時在開啟資料庫前直接還原
+
+快照以 marshal 寫成單一檔案，鍵值為各資料庫檔（含 WAL 檔）的大小與修改時間；
+之後任何寫入都會改變鍵值，讀取時不符即捨棄，改由資料庫載入。
+SQLite 的 PRAGMA data_version 只在同一條連線內有意義，無法跨行程比較，因此以檔案狀態判斷。
+"""
+import marshal
+import os
+import sys
+
+from StockDB import DB_PATH
+
+SNAPSHOT_PATH = "startup.snapshot"
+# 記錄結構或 marshal 格式（隨 Python 版本）改變時快照即失效
+SNAPSHOT_VERSION = (1,) + tuple(sys.version_info[:2])
+DATABASE_FILES = ("CustomerID.db", "ItemValue.db", DB_PATH)
+
+
+def database_key(paths=DATABASE_FILES):
+    """回傳各資料庫檔與其 -wal 檔的 (大小, 修改時間)，不存在的檔案為 None"""
+    key = []
+    for path in paths:
+        for name in (path, path + "-wal"):
+            try:
+                st = os.stat(name)
+            except OSError:
+                key.append(None)
+            else:
+                key.append((st.st_size, st.st_mtime_ns))
+    return tuple(key)
+
+
+def records_key(records):
+    """
+    交易記錄的比對鍵：表頭與品項的輸入欄位
+
+    不含淨重、小計、合計等由輸入計算出的浮點欄位，計算方式或加總順序不同也不影響比對。
+    """
+    return [
+        (
+            r.get("id"), r.get("number"), r.get("inout"), r.get("name"), r.get("carno"),
+            r.get("closeflag"), r.get("fluctuation"),
+            # 品項：id, seq, 名稱, 重車, 空車, 貨重, 扣重 與價格
+            tuple(tuple(item[:7]) + (item[10],) for item in r.get("items") or ()),
+        )
+        for r in records
+    ]
+
+
+def write_snapshot(customers, items, date, records, path=SNAPSHOT_PATH):
+    """
+    寫入快照（先寫暫存檔再取代，寫到一半中斷不會留下損壞的快照）
+
+    必須在資料寫入資料庫之後呼叫，鍵值取自當下的資料庫檔狀態。
+    """
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "key": database_key(),
+        "customers": list(customers),
+        "items": dict(items),
+        "date": date,
+        "records": list(records),
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(marshal.dumps(data))
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path=SNAPSHOT_PATH):
+    """回傳與目前資料庫檔一致的快照 dict，不存在、版本不符或資料庫已變更時回傳 None"""
+    try:
+        # 一次讀入再解析，比讓 marshal 逐段讀取檔案快得多
+        with open(path, "rb") as f:
+            data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+        return None
+    if data.get("key") != database_key():
+        return None
+    return data
@@ -0,0 +1,275 @@
+import os
+import sqlite3
+import threading
+
+DB_PATH = "stockinhand.db"
+
+# 每個連線快取的已編譯 SQL 數量（sqlite3 依 SQL 文字重用 prepared statement）
+STATEMENT_CACHE_SIZE = 256
+
+# 每條連線建立時套用的 pragma：WAL 下 NORMAL 同步只在 checkpoint 時 fsync；
+# cache_size 為負值時單位是 KiB
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# stockinhand.db 的次要索引（IF NOT EXISTS，可對既有資料庫重複套用）
+STOCK_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_stockinhand_date_number ON stockinhand (date, number)",
+    "CREATE INDEX IF NOT EXISTS idx_item_details_stockinhand_seq ON item_details (stockinhand_id, seq)",
+)
+
+# 長期連線：{(資料庫絕對路徑, 執行緒 id): sqlite3.Connection}
+# 主執行緒（Tk）與背景執行緒各自持有一條連線，不會共用同一個 Connection
+_connections = {}
+_connections_lock = threading.Lock()
+
+# stockinhand 表頭欄位與 item_details 品項欄位（與記憶體中的 tuple 順序一致）
+HEADER_COLUMNS = "id, inout, date, number, name, carno, closeflag, fluctuation"
+ITEM_COLUMNS = "id, seq, item, heavy, empty, grossw, minus, netw, account, total, price"
+
+
+def get_connection(db_path=DB_PATH):
+    """
+    取得目前執行緒對 db_path 的長期連線，第一次呼叫時才建立
+
+    連線在程式結束前都不會關閉，避免每次操作重新開檔與解析 schema；
+    同一條 SQL 文字會重用連線內快取的 prepared statement。
+    """
+    key = (os.path.abspath(db_path), threading.get_ident())
+    conn = _connections.get(key)
+    if conn is None:
+        # 每條連線只在建立它的執行緒使用；關閉可能由主執行緒統一處理
+        conn = sqlite3.connect(db_path, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        with _connections_lock:
+            _connections[key] = conn
+    return conn
+
+
+def tune_stock_database(db_path=DB_PATH):
+    """
+    為 stockinhand.db 開啟 WAL 並建立日期/品項索引
+
+    journal_mode 會寫入資料庫檔，索引使用 IF NOT EXISTS，
+    因此新建與既有的資料庫都可以在每次啟動時安全呼叫。
+    """
+    conn = get_connection(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    with conn:
+        for sql in STOCK_INDEXES:
+            conn.execute(sql)
+    # 讓查詢規劃器取得新索引的統計資訊
+    conn.execute("PRAGMA optimize")
+
+
+def execute_write(sql, params=(), db_path=DB_PATH):
+    """在長期連線上執行一條寫入語句並提交，失敗時回滾，回傳 cursor"""
+    conn = get_connection(db_path)
+    with conn:
+        return conn.execute(sql, params)
+
+
+def create_ticket(date, inout=0, name="", carno="", closeflag=0, fluctuation=0, db_path=DB_PATH):
+    """
+    在同一個交易內配發單號、寫入 stockinhand 表頭與第一個空白品項
+
+    單號取自 ticket_sequence（每個日期一列），不需要掃描當日記錄；
+    任何一步失敗都會整筆回滾，不會留下沒有品項的表頭。
+    回傳 (stockinhand_id, number, first_item_id)。
+    """
+    conn = get_connection(db_path)
+    with conn:
+        conn.execute(
+            """
+            INSERT INTO ticket_sequence (date, last_number) VALUES (?, 1)
+            ON CONFLICT(date) DO UPDATE SET last_number = last_number + 1
+            """,
+            (date,),
+        )
+        seq = conn.execute("SELECT last_number FROM ticket_sequence WHERE date = ?", (date,)).fetchone()[0]
+        number = str(seq).zfill(3)
+        cursor = conn.execute(
+            """
+            INSERT INTO stockinhand (inout, date, number, name, carno, closeflag, fluctuation)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (inout, date, number, name, carno, closeflag, fluctuation),
+        )
+        record_id = cursor.lastrowid
+        cursor = conn.execute(
+            """
+            INSERT INTO item_details (stockinhand_id, seq, item, price, heavy, empty, grossw, minus, netw, account, total)
+            VALUES (?, 1, '', 0, 0, 0, 0, 0, 0, 0, 0)
+            """,
+            (record_id,),
+        )
+        return record_id, number, cursor.lastrowid
+
+
+def close_thread_connections():
+    """關閉目前執行緒建立的長期連線（背景執行緒結束前呼叫）"""
+    ident = threading.get_ident()
+    with _connections_lock:
+        keys = [key for key in _connections if key[1] == ident]
+        connections = [_connections.pop(key) for key in keys]
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+def close_all_connections():
+    """關閉所有長期連線（程式結束或清理資源時呼叫）"""
+    with _connections_lock:
+        connections = list(_connections.values())
+        _connections.clear()
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+def item_amounts(item_row):
+    """回傳品項的 (淨重, 小計)：淨重 = 貨重 - 扣重，小計 = 淨重 × 價格"""
+    grossw_val = item_row[5] if item_row[5] else 0.0
+    minus_val = item_row[6] if item_row[6] else 0.0
+    price_val = item_row[10] if item_row[10] else 0.0
+    netw_val = grossw_val - minus_val
+    return netw_val, netw_val * price_val
+
+
+def sum_amounts(amounts):
+    """依品項順序加總 (淨重, 小計) 列表，回傳 (淨重合計, 交易額合計)"""
+    netw_total = 0.0
+    total_account = 0.0
+    for netw_val, account_val in amounts:
+        netw_total += netw_val
+        total_account += account_val
+    return netw_total, total_account
+
+
+def summarize_items(items):
+    """回傳 (每個品項的 (淨重, 小計) 列表, 淨重合計, 交易額合計)"""
+    amounts = [item_amounts(item_row) for item_row in items]
+    netw_total, total_account = sum_amounts(amounts)
+    return amounts, netw_total, total_account
+
+
+def fetch_day_records(conn, date):
+    """
+    以同一個連線載入指定日期的所有交易與品項
+
+    表頭一次查詢，品項以 JOIN 一次取回後在記憶體中依 stockinhand_id 分組，
+    不再為每筆交易各自開連線查詢。
+
+    回傳依 number 降冪排序的 list of dict，結構與 StockInHand 相同。
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT {HEADER_COLUMNS} FROM stockinhand WHERE date = ?",
+        (date,),
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        return []
+
+    items_by_id = {row[0]: [] for row in rows}
+    cursor.execute(
+        """
+        SELECT d.stockinhand_id, d.id, d.seq, d.item, d.heavy, d.empty, d.grossw,
+               d.minus, d.netw, d.account, d.total, d.price
+        FROM item_details AS d
+        JOIN stockinhand AS s ON s.id = d.stockinhand_id
+        WHERE s.date = ?
+        ORDER BY d.stockinhand_id, d.seq
+        """,
+        (date,),
+    )
+    for item_row in cursor.fetchall():
+        bucket = items_by_id.get(item_row[0])
+        if bucket is not None:
+            bucket.append(item_row[1:])
+
+    records = []
+    for rid, inout, rdate, number, name, carno, closeflag, fluctuation in rows:
+        item_rows = items_by_id[rid]
+        amounts, netw_total, total_account = summarize_items(item_rows)
+        records.append({
+            "id": rid,
+            "inout": inout,
+            "date": rdate,
+            "number": number,
+            "name": name,
+            "carno": carno,
+            "items": item_rows,  # 存儲品項列表
+            "amounts": amounts,  # 每個品項的 (淨重, 小計)，與 items 對應
+            "netw": netw_total,
+            "total": total_account,
+            "closeflag": closeflag,
+            "fluctuation": fluctuation,
+        })
+
+    # 依 number 降冪排序
+    records.sort(key=lambda r: r.get("number") or "", reverse=True)
+    return records
+
+
+def load_day_records(date, db_path=DB_PATH):
+    """以長期連線載入指定日期的交易記錄"""
+    return fetch_day_records(get_connection(db_path), date)
+
+
+# 多日查詢的單筆交易總額（item_details.account 由觸發器維護，直接在 SQLite 內加總）
+_TOTAL_SUBQUERY = """
+    (SELECT COALESCE(SUM(d.account), 0) FROM item_details AS d WHERE d.stockinhand_id = s.id)
+"""
+
+
+def count_range_records(conn, start_date, end_date):
+    """回傳日期區間（含首尾）內的交易筆數"""
+    cursor = conn.execute(
+        "SELECT COUNT(*) FROM stockinhand WHERE date BETWEEN ? AND ?",
+        (start_date, end_date),
+    )
+    return cursor.fetchone()[0]
+
+
+def fetch_range_records(conn, start_date, end_date, limit, offset):
+    """
+    分頁載入日期區間內的交易表頭（依日期、number 降冪）
+
+    不載入品項，"items" 為 None；"total" 由 SQLite 直接加總。
+    供虛擬清單（VirtualList.QuerySource）捲動時按需取用。
+    """
+    cursor = conn.execute(
+        f"""
+        SELECT s.id, s.inout, s.date, s.number, s.name, s.carno, s.closeflag, s.fluctuation,
+               {_TOTAL_SUBQUERY} AS total
+        FROM stockinhand AS s
+        WHERE s.date BETWEEN ? AND ?
+        ORDER BY s.date DESC, s.number DESC
+        LIMIT ? OFFSET ?
+        """,
+        (start_date, end_date, limit, offset),
+    )
+    return [
+        {
+            "id": rid,
+            "inout": inout,
+            "date": rdate,
+            "number": number,
+            "name": name,
+            "carno": carno,
+            "items": None,
+            "total": total,
+            "closeflag": closeflag,
+            "fluctuation": fluctuation,
+        }
+        for rid, inout, rdate, number, name, carno, closeflag, fluctuation, total in cursor.fetchall()
+    ]
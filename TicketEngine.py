@@ -0,0 +1,181 @@
+"""
+磅單作業核心：交易、品項與結帳操作，不依賴 Tk
+
+每個操作先寫入 stockinhand.db，成功後才更新記憶體中的 TicketStore（合計以差額維護）；
+GUI 只負責輸入與顯示，批次匯入、自助機或 API 可直接使用 TicketEngine。
+資料庫錯誤以 sqlite3.Error 原樣拋出，已結帳的交易拋出 TicketLockedError。
+"""
+from datetime import datetime
+
+from StockDB import DB_PATH, create_ticket, execute_write, get_connection, load_day_records
+from TicketStore import TicketStore
+
+# 可直接修改數值的品項欄位（item_details 欄位名稱）
+NUMERIC_FIELDS = ("price", "heavy", "empty", "minus")
+
+# 品項 tuple 中各欄位的位置（與 StockDB.ITEM_COLUMNS 順序相同）
+_ITEM_INDEX = {"item": 2, "heavy": 3, "empty": 4, "grossw": 5, "minus": 6, "price": 10}
+
+
+class TicketLockedError(Exception):
+    """交易已結帳（closeflag = 1），不可修改"""
+
+
+def join_carno(prefix, suffix):
+    """組合車牌前後段，任一段空白時只取另一段"""
+    prefix = (prefix or "").strip()
+    suffix = (suffix or "").strip()
+    if prefix and suffix:
+        return f"{prefix}-{suffix}"
+    return prefix or suffix
+
+
+def blank_item(item_id, seq):
+    """新品項的內容：品項名稱空白、所有數值為 0"""
+    return (item_id, seq, "", 0, 0, 0, 0, 0, 0, 0, 0)
+
+
+class TicketEngine:
+    """
+    一個日期的磅單作業
+
+    store 為該日期的 TicketStore（GUI 傳入共用的 StockInHand），date 預設為今天；
+    load_day 切換日期並重新載入。
+    """
+
+    def __init__(self, db_path=DB_PATH, store=None, date=None):
+        self.db_path = db_path
+        self.store = store if store is not None else TicketStore()
+        self.date = date or datetime.now().strftime("%Y-%m-%d")
+
+    def load_day(self, date):
+        """載入指定日期的交易記錄並設為目前日期"""
+        self.store.load(load_day_records(date, self.db_path))
+        self.date = date
+        return self.store
+
+    def _write(self, sql, params=()):
+        return execute_write(sql, params, self.db_path)
+
+    @staticmethod
+    def _check_open(record):
+        if record.get("closeflag") == 1:
+            raise TicketLockedError(f"編號 {record.get('number')} 已結帳")
+
+    # ---- 交易 ----
+    def create_ticket(self, name="", carno="", inout=0):
+        """配發單號並新增交易（含第一個空白品項），回傳新記錄"""
+        record_id, number, first_item_id = create_ticket(
+            self.date, inout=inout, name=name, carno=carno, db_path=self.db_path
+        )
+        record = {
+            "id": record_id,
+            "inout": inout,
+            "date": self.date,
+            "number": number,
+            "name": name,
+            "carno": carno,
+            "items": [blank_item(first_item_id, 1)],
+            "total": 0.0,
+            "closeflag": 0,
+            "fluctuation": 0,
+        }
+        self.store.add(record)
+        return record
+
+    def update_ticket(self, record, name, carno):
+        """修改廠商與車牌"""
+        self._check_open(record)
+        if record.get("id") is not None:
+            self._write("UPDATE stockinhand SET name = ?, carno = ? WHERE id = ?", (name, carno, record.get("id")))
+        else:
+            self._write(
+                "UPDATE stockinhand SET name = ?, carno = ? WHERE number = ? AND date = ?",
+                (name, carno, record.get("number"), record.get("date")),
+            )
+        record["name"] = name
+        record["carno"] = carno
+        return record
+
+    def delete_ticket(self, record):
+        """在同一個交易內刪除表頭與其品項（連線未開啟 foreign_keys，不依賴 ON DELETE CASCADE）"""
+        self._check_open(record)
+        conn = get_connection(self.db_path)
+        with conn:
+            if record.get("id") is not None:
+                record_ids = [(record.get("id"),)]
+            else:
+                record_ids = conn.execute(
+                    "SELECT id FROM stockinhand WHERE number = ? AND date = ?",
+                    (record.get("number"), record.get("date")),
+                ).fetchall()
+            conn.executemany("DELETE FROM item_details WHERE stockinhand_id = ?", record_ids)
+            conn.executemany("DELETE FROM stockinhand WHERE id = ?", record_ids)
+        return self.store.remove(record.get("number"))
+
+    def checkout(self, record):
+        """結帳：鎖定交易"""
+        self._set_closeflag(record, 1)
+
+    def reopen(self, record):
+        """取消結帳"""
+        self._set_closeflag(record, 0)
+
+    def _set_closeflag(self, record, flag):
+        self._write("UPDATE stockinhand SET closeflag = ? WHERE id = ?", (flag, record.get("id")))
+        record["closeflag"] = flag
+
+    # ---- 品項 ----
+    def add_item(self, record):
+        """在交易末端新增一個空白品項，回傳新品項"""
+        self._check_open(record)
+        seq = len(record.get("items", [])) + 1
+        cursor = self._write(
+            """
+            INSERT INTO item_details (stockinhand_id, seq, item, price, heavy, empty, grossw, minus, netw, account, total)
+            VALUES (?, ?, '', 0, 0, 0, 0, 0, 0, 0, 0)
+            """,
+            (record.get("id"), seq),
+        )
+        self.store.append_item(record, blank_item(cursor.lastrowid, seq))
+        return record["items"][-1]
+
+    def delete_item(self, record, index):
+        """刪除第 index 個品項，回傳被刪除的品項"""
+        self._check_open(record)
+        item_id = record["items"][index][0]
+        self._write("DELETE FROM item_details WHERE id = ?", (item_id,))
+        return self.store.pop_item(record, index)
+
+    def set_item_value(self, record, index, field, value):
+        """
+        修改第 index 個品項的數值欄位（price/heavy/empty/minus），回傳更新後的品項
+
+        重車與空車四捨五入為整數，並重算貨重（重車 - 空車，不小於 0）；
+        淨重與小計由資料庫觸發器與 TicketStore 依相同公式更新。
+        """
+        if field not in NUMERIC_FIELDS:
+            raise ValueError(f"不支援的欄位: {field}")
+        self._check_open(record)
+        item_row = list(record["items"][index])
+        if field in ("heavy", "empty"):
+            value = round(value)
+        item_row[_ITEM_INDEX[field]] = value
+        if field in ("heavy", "empty"):
+            grossw_val = round(max(item_row[3] - item_row[4], 0.0))
+            item_row[5] = grossw_val
+            self._write(f"UPDATE item_details SET {field} = ?, grossw = ? WHERE id = ?", (value, grossw_val, item_row[0]))
+        else:
+            self._write(f"UPDATE item_details SET {field} = ? WHERE id = ?", (value, item_row[0]))
+        self.store.replace_item(record, index, tuple(item_row))
+        return record["items"][index]
+
+    def set_item_product(self, record, index, name, price):
+        """將第 index 個品項改為指定商品與單價，回傳更新後的品項"""
+        self._check_open(record)
+        item_row = list(record["items"][index])
+        self._write("UPDATE item_details SET item = ?, price = ? WHERE id = ?", (name, price, item_row[0]))
+        item_row[_ITEM_INDEX["item"]] = name
+        item_row[_ITEM_INDEX["price"]] = price
+        self.store.replace_item(record, index, tuple(item_row))
+        return record["items"][index]
@@ -0,0 +1,168 @@
+from bisect import bisect_left, bisect_right
+
+from StockDB import item_amounts, sum_amounts, summarize_items
+
+# 當日合計保留的小數位數（遠高於畫面顯示的精度），避免大量異動後累積浮點誤差
+DAY_TOTAL_DIGITS = 6
+
+
+def _sort_key(record):
+    return record.get("number") or ""
+
+
+def _with_amounts(item_row, netw_val, account_val):
+    """回傳 netw/account/total 欄位已更新的品項 tuple（與資料庫觸發器的計算一致）"""
+    return tuple(item_row[:7]) + (netw_val, account_val, account_val) + tuple(item_row[10:])
+
+
+class TicketStore:
+    """
+    當日交易記錄集合（取代原本的 StockInHand list）
+
+    以 number 與資料庫 id 建立字典索引，查找為 O(1)；
+    記錄依 number 降冪排列，新增/刪除以二分搜尋定位，不需要整體重新排序。
+
+    每筆記錄另存 "amounts"（每個品項的 (淨重, 小計)）與 "netw"/"total" 合計，
+    品項異動須透過 append_item / replace_item / pop_item：該筆交易的合計由 amounts 重新加總
+    （與重新載入的結果完全相同），當日合計（day_netw / day_total）以前後差額更新，不必重新掃描。
+    """
+
+    def __init__(self, records=None):
+        # 內部以 number 升冪保存，對外迭代時反轉為降冪（顯示順序）
+        self._keys = []
+        self._records = []
+        self._by_number = {}
+        self._by_id = {}
+        self.day_netw = 0.0
+        self.day_total = 0.0
+        if records:
+            self.load(records)
+
+    def load(self, records):
+        """以新的記錄整批取代目前內容"""
+        self.clear()
+        self._records = sorted(records, key=_sort_key)
+        self._keys = [_sort_key(r) for r in self._records]
+        for record in self._records:
+            self._index(record)
+            self._apply_totals(record, 1)
+
+    def clear(self):
+        self._keys.clear()
+        self._records.clear()
+        self._by_number.clear()
+        self._by_id.clear()
+        self.day_netw = 0.0
+        self.day_total = 0.0
+
+    def _apply_totals(self, record, sign):
+        """將記錄的合計加入（sign=1）或移出（sign=-1）當日合計；缺少快取時先計算"""
+        if record.get("amounts") is None:
+            amounts, netw_total, total_account = summarize_items(record.get("items") or [])
+            record["amounts"] = amounts
+            record["netw"] = netw_total
+            record["total"] = total_account
+        self._add_day_totals(sign * record.get("netw", 0.0), sign * record.get("total", 0.0))
+
+    def _add_day_totals(self, netw_delta, account_delta):
+        self.day_netw = round(self.day_netw + netw_delta, DAY_TOTAL_DIGITS)
+        self.day_total = round(self.day_total + account_delta, DAY_TOTAL_DIGITS)
+
+    def _refresh_totals(self, record):
+        """品項異動後由 amounts 重新加總該筆交易（最多數個品項），當日合計加上前後差額"""
+        old_netw = record.get("netw", 0.0)
+        old_total = record.get("total", 0.0)
+        record["netw"], record["total"] = sum_amounts(record["amounts"])
+        if self._by_number.get(record.get("number")) is record:
+            self._add_day_totals(record["netw"] - old_netw, record["total"] - old_total)
+
+    def _index(self, record):
+        self._by_number[record.get("number")] = record
+        if record.get("id") is not None:
+            self._by_id[record.get("id")] = record
+
+    def _position(self, record):
+        """回傳 record 在內部升冪陣列中的位置，找不到時回傳 -1"""
+        key = _sort_key(record)
+        lo = bisect_left(self._keys, key)
+        hi = bisect_right(self._keys, key, lo)
+        for pos in range(lo, hi):
+            if self._records[pos] is record:
+                return pos
+        return -1
+
+    def add(self, record):
+        """加入一筆記錄並維持排序，回傳其顯示位置"""
+        key = _sort_key(record)
+        pos = bisect_right(self._keys, key)
+        self._keys.insert(pos, key)
+        self._records.insert(pos, record)
+        self._index(record)
+        self._apply_totals(record, 1)
+        return len(self._records) - 1 - pos
+
+    def remove(self, number):
+        """依 number 移除記錄，回傳被移除的記錄（不存在時回傳 None）"""
+        record = self._by_number.pop(number, None)
+        if record is None:
+            return None
+        if record.get("id") is not None:
+            self._by_id.pop(record.get("id"), None)
+        pos = self._position(record)
+        if pos >= 0:
+            del self._keys[pos]
+            del self._records[pos]
+        self._apply_totals(record, -1)
+        return record
+
+    # ---- 品項異動（重新加總該筆交易，差額更新當日合計） ----
+    def append_item(self, record, item_row):
+        """在記錄末端加入一個品項"""
+        netw_val, account_val = item_amounts(item_row)
+        record["items"].append(_with_amounts(item_row, netw_val, account_val))
+        record["amounts"].append((netw_val, account_val))
+        self._refresh_totals(record)
+
+    def replace_item(self, record, index, item_row):
+        """以新的品項內容取代第 index 個品項"""
+        netw_val, account_val = item_amounts(item_row)
+        record["items"][index] = _with_amounts(item_row, netw_val, account_val)
+        record["amounts"][index] = (netw_val, account_val)
+        self._refresh_totals(record)
+
+    def pop_item(self, record, index):
+        """移除並回傳第 index 個品項"""
+        item_row = record["items"].pop(index)
+        record["amounts"].pop(index)
+        self._refresh_totals(record)
+        return item_row
+
+    def get(self, number):
+        """依 number 取得記錄"""
+        return self._by_number.get(number)
+
+    def get_by_id(self, record_id):
+        """依資料庫 id 取得記錄"""
+        return self._by_id.get(record_id)
+
+    def index_of(self, record):
+        """回傳記錄的顯示位置（number 降冪），不存在時回傳 -1"""
+        pos = self._position(record)
+        return len(self._records) - 1 - pos if pos >= 0 else -1
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return reversed(self._records)
+
+    def __getitem__(self, index):
+        """依顯示位置取得記錄"""
+        if index < 0:
+            index += len(self._records)
+        if not 0 <= index < len(self._records):
+            raise IndexError("TicketStore index out of range")
+        return self._records[len(self._records) - 1 - index]
+
+    def __contains__(self, number):
+        return number in self._by_number
@@ -0,0 +1,239 @@
+from tkinter import ttk
+from collections import OrderedDict
+
+
+class StoreSource:
+    """
+    以 TicketStore 為資料來源
+
+    row_func(index, record) 回傳 (values, tag)；列的 key 為記錄的資料庫 id。
+    """
+
+    def __init__(self, store, row_func):
+        self.store = store
+        self.row_func = row_func
+
+    def __len__(self):
+        return len(self.store)
+
+    def record(self, index):
+        return self.store[index]
+
+    def row(self, index):
+        record = self.store[index]
+        values, tag = self.row_func(index, record)
+        return record.get("id"), values, tag
+
+    def index_of_key(self, key):
+        record = self.store.get_by_id(key)
+        return self.store.index_of(record) if record is not None else -1
+
+
+class QuerySource:
+    """
+    以資料庫分頁查詢為資料來源（多日/歷史查詢）
+
+    count_func() 回傳總筆數，fetch_func(limit, offset) 回傳該頁的記錄 (list of dict)；
+    只保留最近存取的 max_pages 頁，捲動時才向資料庫取資料。
+    """
+
+    def __init__(self, count_func, fetch_func, row_func, page_size=200, max_pages=20):
+        self.fetch_func = fetch_func
+        self.row_func = row_func
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._count = count_func()
+        self._pages = OrderedDict()
+
+    def __len__(self):
+        return self._count
+
+    def record(self, index):
+        page_no = index // self.page_size
+        page = self._pages.get(page_no)
+        if page is None:
+            page = self.fetch_func(self.page_size, page_no * self.page_size)
+            self._pages[page_no] = page
+            if len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page_no)
+        return page[index - page_no * self.page_size]
+
+    def row(self, index):
+        record = self.record(index)
+        values, tag = self.row_func(index, record)
+        return record.get("id"), values, tag
+
+    def index_of_key(self, key):
+        """只在已載入的頁面中尋找，找不到時回傳 -1"""
+        for page_no, page in self._pages.items():
+            for offset, record in enumerate(page):
+                if record.get("id") == key:
+                    return page_no * self.page_size + offset
+        return -1
+
+
+class VirtualTreeview:
+    """
+    只實體化可見範圍的 Treeview 清單
+
+    Treeview 內只保留固定數量的列（slot），捲動時改寫 slot 的內容而不新增/刪除列；
+    選取狀態以資料 key 記錄，捲出畫面後再捲回仍會保留。
+    使用者選取不同列時會在 tree 上觸發 <<ListSelect>> 虛擬事件。
+    """
+
+    def __init__(self, parent, columns, height=8, **tree_options):
+        self.tree = ttk.Treeview(parent, columns=columns, show="headings", height=height,
+                                 selectmode="browse", **tree_options)
+        self.source = None
+        self.offset = 0  # 第一個可見列在資料來源中的位置
+        self.visible = height  # 可見列數，依視窗大小調整
+        self.yscrollcommand = None
+        self._selected_key = None
+        self._slots = []  # Treeview 中實際存在的列 iid
+        self._slot_rows = []  # 每個 slot 目前顯示的 (key, values, tag)
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_by(3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._scroll_by(-self.visible))
+        self.tree.bind("<Next>", lambda e: self._scroll_by(self.visible))
+
+    # ---- 資料與選取 ----
+    def set_source(self, source):
+        """更換資料來源並捲回頂端"""
+        self.source = source
+        self.offset = 0
+        self.refresh()
+
+    def selected_key(self):
+        """回傳選取列的 key，未選取時回傳 None"""
+        return self._selected_key
+
+    def select_key(self, key):
+        """以 key 選取列（不觸發 <<ListSelect>>）"""
+        self._selected_key = key
+        self.refresh()
+
+    def clear_selection(self):
+        self._selected_key = None
+        self.refresh()
+
+    def see_key(self, key):
+        """捲動使 key 對應的列可見"""
+        if self.source is None:
+            return
+        index = self.source.index_of_key(key)
+        if index < 0:
+            return
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible:
+            self.offset = index - self.visible + 1
+        self.refresh()
+
+    def refresh(self):
+        """依資料來源更新可見範圍內的列，只改寫內容有變動的 slot"""
+        total = len(self.source) if self.source is not None else 0
+        self.offset = max(0, min(self.offset, total - self.visible))
+        count = min(self.visible, total - self.offset)
+
+        while len(self._slots) < count:
+            iid = f"slot{len(self._slots)}"
+            self.tree.insert("", "end", iid=iid)
+            self._slots.append(iid)
+            self._slot_rows.append(None)
+        while len(self._slots) > count:
+            self.tree.delete(self._slots.pop())
+            self._slot_rows.pop()
+
+        selected_slot = None
+        for i, iid in enumerate(self._slots):
+            row = self.source.row(self.offset + i)
+            if self._slot_rows[i] != row:
+                key, values, tag = row
+                self.tree.item(iid, values=values, tags=(tag,))
+                self._slot_rows[i] = row
+            if self._selected_key is not None and row[0] == self._selected_key:
+                selected_slot = iid
+
+        current = self.tree.selection()
+        if selected_slot is not None:
+            if current != (selected_slot,):
+                self.tree.selection_set(selected_slot)
+        elif current:
+            self.tree.selection_remove(*current)
+
+        self._update_scrollbar(total)
+
+    # ---- 捲動 ----
+    def yview(self, *args):
+        """Scrollbar 的 command，支援 moveto 與 scroll"""
+        if self.source is None or not args:
+            return
+        total = len(self.source)
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * total)
+            self.refresh()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if len(args) > 2 and args[2] == "pages":
+                amount *= self.visible
+            self._scroll_by(amount)
+
+    def _scroll_by(self, rows):
+        self.offset += rows
+        self.refresh()
+        return "break"
+
+    def _update_scrollbar(self, total):
+        if self.yscrollcommand is None:
+            return
+        if total <= 0:
+            self.yscrollcommand(0.0, 1.0)
+        else:
+            self.yscrollcommand(self.offset / total, min(1.0, (self.offset + self.visible) / total))
+
+    def _on_mousewheel(self, event):
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_configure(self, event):
+        """依 Treeview 實際高度計算可容納的列數"""
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        header_height = row_height
+        if self._slots:
+            bbox = self.tree.bbox(self._slots[0])
+            if bbox:
+                header_height, row_height = bbox[1], bbox[3]
+        visible = max(1, (event.height - header_height) // max(1, row_height))
+        if visible != self.visible:
+            self.visible = visible
+            self.refresh()
+
+    # ---- 使用者選取 ----
+    def _on_tree_select(self, event):
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self._slots:
+            return
+        row = self._slot_rows[self._slots.index(selection[0])]
+        if row is None or row[0] == self._selected_key:
+            return
+        self._selected_key = row[0]
+        self.tree.event_generate("<<ListSelect>>")
+
+    def _move_selection(self, step):
+        """以鍵盤上下移動選取列，必要時捲動"""
+        if self.source is None or not len(self.source):
+            return "break"
+        index = self.source.index_of_key(self._selected_key) if self._selected_key is not None else -1
+        index = max(0, min(len(self.source) - 1, index + step if index >= 0 else self.offset))
+        key = self.source.row(index)[0]
+        self._selected_key = key
+        self.see_key(key)
+        self.tree.event_generate("<<ListSelect>>")
+        return "break"
@@ -0,0 +1,92 @@
+"""
+日期查詢效能測試：建立索引前後載入單日交易的耗時比較
+
+用法：
+    python benchmarks/bench_date_lookup.py [--rows 1000000] [--per-day 200]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from StockDB import close_all_connections, fetch_day_records, get_connection, tune_stock_database
+
+
+def build_database(path, rows, per_day):
+    """建立 rows 筆交易（每筆一個品項）的合成歷史資料庫，每天 per_day 筆"""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE stockinhand (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            inout INTEGER, date TEXT, number TEXT, name TEXT, carno TEXT,
+            closeflag INTEGER, fluctuation INTEGER
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE item_details (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            stockinhand_id INTEGER, seq INTEGER, item TEXT,
+            heavy FLOAT, empty FLOAT, grossw FLOAT, minus FLOAT,
+            netw FLOAT, account FLOAT, total FLOAT, price FLOAT
+        )
+        """
+    )
+    start = date(2015, 1, 1)
+    conn.executemany(
+        "INSERT INTO stockinhand (id, inout, date, number, name, carno, closeflag, fluctuation) "
+        "VALUES (?, 0, ?, ?, '客戶', 'ABC-0001', 1, 0)",
+        (
+            (i + 1, (start + timedelta(days=i // per_day)).isoformat(), str(i % per_day + 1).zfill(3))
+            for i in range(rows)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO item_details (stockinhand_id, seq, item, heavy, empty, grossw, minus, netw, account, total, price) "
+        "VALUES (?, 1, '鐵', 15000, 8000, 7000, 0, 0, 0, 0, 8.5)",
+        ((i + 1,) for i in range(rows)),
+    )
+    conn.commit()
+    conn.close()
+    return [(start + timedelta(days=d)).isoformat() for d in range(0, rows // per_day, max(1, rows // per_day // 20))]
+
+
+def time_lookups(conn, dates):
+    """回傳每次載入單日交易的平均耗時（秒）"""
+    start = time.perf_counter()
+    for day in dates:
+        fetch_day_records(conn, day)
+    return (time.perf_counter() - start) / len(dates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--per-day", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stockinhand.db")
+        print(f"建立 {args.rows:,} 筆交易的測試資料庫...")
+        dates = build_database(path, args.rows, args.per_day)
+
+        before = time_lookups(get_connection(path), dates)
+        tune_stock_database(path)
+        after = time_lookups(get_connection(path), dates)
+        close_all_connections()
+
+        print(f"查詢日期數: {len(dates)}（每日 {args.per_day} 筆）")
+        print(f"無索引: {before * 1000:10.2f} ms/日")
+        print(f"有索引: {after * 1000:10.2f} ms/日")
+        print(f"加速倍數: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+日交易載入效能測試：逐筆查詢（N+1）與單次 JOIN 載入比較
+
+用法：
+    python benchmarks/bench_day_loader.py [--tickets 5000] [--items 3]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from StockDB import close_all_connections, load_day_records
+
+DAY = "2024-01-15"
+
+
+def build_database(path, tickets, items_per_ticket):
+    """建立合成資料庫：指定日期 tickets 筆交易，另有前後兩天的干擾資料"""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE stockinhand (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            inout INTEGER, date TEXT, number TEXT, name TEXT, carno TEXT,
+            closeflag INTEGER, fluctuation INTEGER
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE item_details (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            stockinhand_id INTEGER, seq INTEGER, item TEXT,
+            heavy FLOAT, empty FLOAT, grossw FLOAT, minus FLOAT,
+            netw FLOAT, account FLOAT, total FLOAT, price FLOAT
+        )
+        """
+    )
+    for date in ("2024-01-14", DAY, "2024-01-16"):
+        for n in range(1, tickets + 1):
+            cursor = conn.execute(
+                "INSERT INTO stockinhand (inout, date, number, name, carno, closeflag, fluctuation) "
+                "VALUES (0, ?, ?, ?, ?, 0, 0)",
+                (date, str(n).zfill(3), f"客戶{n % 50}", f"ABC-{n:04d}"),
+            )
+            rid = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO item_details (stockinhand_id, seq, item, heavy, empty, grossw, minus, netw, account, total, price) "
+                "VALUES (?, ?, '鐵', ?, ?, ?, ?, 0, 0, 0, ?)",
+                [
+                    (rid, seq, 15000 + seq, 8000, 7000 + seq, seq * 1.5, 8.5)
+                    for seq in range(1, items_per_ticket + 1)
+                ],
+            )
+    conn.commit()
+    conn.close()
+
+
+def legacy_load(path, date):
+    """原本 load_today_records 的做法：每筆交易各開一次連線查詢品項"""
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id, inout, date, number, name, carno, closeflag, fluctuation FROM stockinhand WHERE date = ?",
+        (date,),
+    )
+    rows = cursor.fetchall()
+    conn.close()
+
+    records = []
+    for rid, inout, rdate, number, name, carno, closeflag, fluctuation in rows:
+        conn = sqlite3.connect(path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id, seq, item, heavy, empty, grossw, minus, netw, account, total, price "
+            "FROM item_details WHERE stockinhand_id = ? ORDER BY seq",
+            (rid,),
+        )
+        item_rows = cursor.fetchall()
+        conn.close()
+        total_account = 0.0
+        for item_row in item_rows:
+            grossw_val = item_row[5] if item_row[5] else 0.0
+            minus_val = item_row[6] if item_row[6] else 0.0
+            price_val = item_row[10] if item_row[10] else 0.0
+            total_account += (grossw_val - minus_val) * price_val
+        records.append({
+            "id": rid, "inout": inout, "date": rdate, "number": number,
+            "name": name, "carno": carno, "items": item_rows,
+            "total": total_account,
+            "closeflag": closeflag, "fluctuation": fluctuation,
+        })
+    records.sort(key=lambda r: r.get("number") or "", reverse=True)
+    return records
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stockinhand.db")
+        build_database(path, args.tickets, args.items)
+
+        legacy_time, legacy_records = best_of(lambda: legacy_load(path, DAY), args.repeat)
+        new_time, new_records = best_of(lambda: load_day_records(DAY, db_path=path), args.repeat)
+        close_all_connections()
+
+        def project(records):
+            return [(r["id"], r["number"], r["items"], r["total"]) for r in records]
+
+        if project(legacy_records) != project(new_records):
+            print("✗ 兩種載入方式的結果不一致")
+            sys.exit(1)
+
+        print(f"交易筆數: {len(new_records)}（每筆 {args.items} 個品項）")
+        print(f"逐筆查詢 (N+1): {legacy_time * 1000:10.1f} ms")
+        print(f"單次 JOIN 載入: {new_time * 1000:10.1f} ms")
+        print(f"加速倍數: {legacy_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
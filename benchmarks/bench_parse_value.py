@@ -0,0 +1,147 @@
+"""
+parse_value 微基準測試：原本的多重策略啟發式與依指示器設定的預編譯解析方式比較（速度與正確率）
+
+樣本為常見指示器的實際輸出格式（已依資料框格式切好、移除奇偶校驗位前的位元組）。
+
+用法：
+    python benchmarks/bench_parse_value.py [--repeat 2000]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ScaleDecoder import PARITY_TABLE, profile_from_spec
+
+EVEN_PARITY_TABLE = bytes(b | 0x80 if bin(b).count("1") % 2 else b for b in range(256))
+
+# (指示器格式, 設定的解析方式, 單一資料框, 正確重量)
+SAMPLES = [
+    ("ST,GS 文字行", "signed", b"ST,GS,+006830kg\r", 6830.0),
+    ("ST,GS 文字行", "signed", b"ST,GS,+015240kg\r", 15240.0),
+    ("ST,GS 文字行", "signed", b"ST,GS,+000000kg\r", 0.0),
+    ("ST,GS 文字行", "signed", b"US,GS,-000120kg\r", -120.0),
+    ("ST,GS 文字行", "signed", b"ST,NT,+0012.5kg\r", 12.5),
+    ("ST,GS 文字行 7E1", "signed", b"ST,GS,+006830kg\r".translate(EVEN_PARITY_TABLE), 6830.0),
+    ("ST,GS 文字行 7E1", "signed", b"ST,GS,+042180kg\r".translate(EVEN_PARITY_TABLE), 42180.0),
+    ("STX/ETX", "signed", b"+012345", 12345.0),
+    ("STX/ETX", "signed", b"+000080", 80.0),
+    ("STX/ETX", "signed", b"-000035", -35.0),
+    ("空白對齊", "signed", b"   15240 kg", 15240.0),
+    ("空白對齊", "signed", b"     350 kg", 350.0),
+    ("Toledo 連續輸出", "toledo", b"1  015240000000", 15240.0),
+    ("Toledo 連續輸出", "toledo", b"40 006830000120", 6830.0),
+    ("Toledo 連續輸出", "toledo", b"4  000350000000", 350.0),
+]
+
+
+# ---- 原本 reader_thread + parse_value 的寫法（未預編譯、逐字元清理） ----
+def legacy_parse_value(text):
+    cleaned_text = ''.join(c if (c.isdigit() or c in '+-. \n\r') else '' for c in text)
+    long_match = re.search(r'[\s+]?([+-]?\d{4,10})(?:[^\d]|$)', cleaned_text)
+    if long_match:
+        try:
+            val = float(long_match.group(1))
+            if val < 1000000:
+                return val
+        except:
+            pass
+    match_6digits = re.search(r'[\s]?([+-]?\d{6})(?:[^\d]|$)', cleaned_text)
+    if match_6digits:
+        try:
+            return float(match_6digits.group(1))
+        except:
+            pass
+    matches = re.findall(r'[-+]?\d{1,10}(?:\.\d+)?', cleaned_text)
+    if not matches:
+        return None
+    values = []
+    for m in matches:
+        try:
+            values.append(float(m))
+        except:
+            continue
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    if len(matches) >= 2:
+        combined = ''.join([m.lstrip('+') for m in matches if m.replace('+', '').replace('-', '').replace('.', '').isdigit()])
+        try:
+            combined_val = float(combined)
+            if combined_val < 1000000:
+                return combined_val
+        except:
+            pass
+    non_zero_values = [v for v in values if v != 0.0]
+    if non_zero_values:
+        return max(non_zero_values)
+    return values[-1]
+
+
+def legacy_parse_frame(line):
+    ascii_clean = ''.join(
+        chr(b & 0x7F) if ((b & 0x7F) in range(48, 58) or (b & 0x7F) in [43, 45, 46]) else ''
+        for b in line
+    )
+    if ascii_clean and any(c.isdigit() for c in ascii_clean):
+        text = ascii_clean
+    else:
+        text = line.decode('utf-8', errors='ignore').strip()
+    return legacy_parse_value(text) if text else None
+
+
+def time_per_frame(func, frames, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            func(frame)
+    return (time.perf_counter() - start) / (repeat * len(frames))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    auto = profile_from_spec("auto")
+    print(f"{'指示器格式':<16}{'樣本':>4}  {'原本 正確':>9}  {'auto 正確':>9}  {'設定 正確':>9}  "
+          f"{'原本 µs':>8}  {'auto µs':>8}  {'設定 µs':>8}")
+
+    formats = []
+    for name, profile_name, _, _ in SAMPLES:
+        if (name, profile_name) not in formats:
+            formats.append((name, profile_name))
+
+    totals = [0, 0, 0, 0]
+    for name, profile_name in formats:
+        samples = [(frame, expected) for n, p, frame, expected in SAMPLES if n == name]
+        profile = profile_from_spec(profile_name)
+        raw = [frame for frame, _ in samples]
+        # ScaleDecoder 在切框前已整段移除奇偶校驗位
+        stripped = [frame.translate(PARITY_TABLE) for frame in raw]
+
+        legacy_ok = sum(legacy_parse_frame(f) == e for f, (_, e) in zip(raw, samples))
+        auto_ok = sum(auto.parse(f) == e for f, (_, e) in zip(stripped, samples))
+        profile_ok = sum(profile.parse(f) == e for f, (_, e) in zip(stripped, samples))
+        legacy_t = time_per_frame(legacy_parse_frame, raw, args.repeat)
+        auto_t = time_per_frame(auto.parse, stripped, args.repeat)
+        profile_t = time_per_frame(profile.parse, stripped, args.repeat)
+
+        totals[0] += len(samples)
+        totals[1] += legacy_ok
+        totals[2] += auto_ok
+        totals[3] += profile_ok
+        n = len(samples)
+        print(f"{name:<16}{n:>4}  {legacy_ok:>5}/{n:<3}  {auto_ok:>5}/{n:<3}  {profile_ok:>5}/{n:<3}  "
+              f"{legacy_t * 1e6:8.2f}  {auto_t * 1e6:8.2f}  {profile_t * 1e6:8.2f}")
+
+    n, legacy_ok, auto_ok, profile_ok = totals
+    print(f"合計正確率：原本 {legacy_ok}/{n}，auto {auto_ok}/{n}，依指示器設定 {profile_ok}/{n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+磅秤讀取延遲與吞吐量測試：以 pty 模擬磅秤，多台共用同一個 asyncio 事件迴圈（僅 POSIX）
+
+每台模擬磅秤送出遞增序號作為重量，比對送出與 ScaleService 解析出讀數的時間。
+
+用法：
+    python benchmarks/bench_scale_latency.py [--scales 2] [--rate 50] [--seconds 5] [--baud 115200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ScaleService import ScaleService
+from ScaleSimulator import ScaleSimulator, counter_profile
+from ScaleTransport import ScaleLoop
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, default=2)
+    parser.add_argument("--rate", type=float, default=50.0, help="每台每秒送出的框數")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--baud", type=int, default=115200)
+    args = parser.parse_args()
+
+    scale_loop = ScaleLoop()
+    rigs = []
+    for _ in range(args.scales):
+        sent_at = {}
+        received = []
+
+        def on_sent(weight, t, sent_at=sent_at):
+            sent_at[int(weight)] = t
+
+        def on_reading(value, sent_at=sent_at, received=received):
+            t = time.perf_counter()
+            start = sent_at.get(int(value))
+            if start is not None:
+                received.append(t - start)
+
+        simulator = ScaleSimulator(counter_profile(args.rate), rate=args.rate, on_sent=on_sent)
+        port = simulator.start()
+        service = ScaleService(port=port, baud=args.baud, on_reading=on_reading)
+        service.start(scale_loop)
+        rigs.append((simulator, service, received))
+
+    # 等待所有磅秤連線後才開始計算
+    deadline = time.perf_counter() + 5.0
+    while not all(service.connected for _, service, _ in rigs) and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    for simulator, _, received in rigs:
+        received.clear()
+        simulator.sent = 0
+
+    time.sleep(args.seconds)
+
+    for simulator, service, _ in rigs:
+        service.stop()
+        simulator.stop()
+    scale_loop.stop()
+
+    latencies = sorted(latency for _, _, received in rigs for latency in received)
+    sent = sum(simulator.sent for simulator, _, _ in rigs)
+    print(f"磅秤數: {args.scales}，每台 {args.rate:g} 框/秒，測試 {args.seconds:g} 秒（單一事件迴圈）")
+    print(f"送出 {sent} 框，解析 {len(latencies)} 筆（{len(latencies) / args.seconds:.1f} 筆/秒）")
+    print(
+        "延遲 (ms): "
+        f"p50 {percentile(latencies, 0.5) * 1000:.2f}  "
+        f"p95 {percentile(latencies, 0.95) * 1000:.2f}  "
+        f"p99 {percentile(latencies, 0.99) * 1000:.2f}  "
+        f"max {(latencies[-1] if latencies else float('nan')) * 1000:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
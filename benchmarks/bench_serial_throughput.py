@@ -0,0 +1,132 @@
+"""
+序列埠解碼吞吐量測試：原本 reader_thread 的緩衝方式與 ScaleDecoder 環形緩衝區比較
+
+以 115200 baud（8N1 約 11,520 bytes/s）的錄製資料依序列埠讀取的大小分段餵入，
+未指定 --capture 時產生帶奇偶校驗位的合成資料。
+
+用法：
+    python benchmarks/bench_serial_throughput.py [--seconds 600] [--capture raw.bin] [--frame lf]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ScaleDecoder import ScaleDecoder, frame_from_spec, parse_value
+
+BAUD = 115200
+BYTES_PER_SECOND = BAUD // 10  # 1 起始位元 + 8 資料位元 + 1 停止位元
+
+
+def with_even_parity(data):
+    """模擬 7E1 傳輸：在最高位加上偶同位位元"""
+    return bytes(b | 0x80 if bin(b).count("1") % 2 else b for b in data)
+
+
+def synthetic_capture(seconds):
+    """產生 seconds 秒的連續磅秤輸出（含重量變動與少量雜訊）"""
+    rng = random.Random(115200)
+    chunks = []
+    size = 0
+    weight = 0
+    while size < seconds * BYTES_PER_SECOND:
+        weight = max(0, min(80000, weight + rng.randint(-40, 60)))
+        line = b"ST,GS,+%06dkg\r\n" % weight
+        if rng.random() < 0.01:
+            line = b"\x00\xff" + line
+        chunks.append(line)
+        size += len(line)
+    return with_even_parity(b"".join(chunks))
+
+
+def read_sizes(total, seed=9600):
+    """模擬 ser.read(in_waiting) 每次取得的位元組數"""
+    rng = random.Random(seed)
+    sizes = []
+    while total > 0:
+        n = min(total, rng.randint(1, 64))
+        sizes.append(n)
+        total -= n
+    return sizes
+
+
+def legacy_decode(data, sizes):
+    """原本 reader_thread 的做法：buffer += data、split 成新 list、逐位元組移除校驗位"""
+    buffer = b""
+    values = []
+    pos = 0
+    for n in sizes:
+        buffer += data[pos:pos + n]
+        pos += n
+        if b'\n' in buffer:
+            lines = buffer.split(b'\n')
+            buffer = lines[-1]
+            for line in lines[:-1]:
+                ascii_clean = ''.join(
+                    chr(b & 0x7F) if ((b & 0x7F) in range(48, 58) or (b & 0x7F) in [43, 45, 46]) else ''
+                    for b in line
+                )
+                if ascii_clean and any(c.isdigit() for c in ascii_clean):
+                    val = parse_value(ascii_clean)
+                    if val is not None:
+                        values.append(val)
+        if len(buffer) > 1000:
+            buffer = buffer[-100:]
+    return values
+
+
+def ring_decode(data, sizes, frame):
+    decoder = ScaleDecoder(frame)
+    values = []
+    pos = 0
+    for n in sizes:
+        values.extend(decoder.feed(data[pos:pos + n]))
+        pos += n
+    return values
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=int, default=600, help="合成資料的長度（秒）")
+    parser.add_argument("--capture", help="原始位元組錄製檔（取代合成資料）")
+    parser.add_argument("--frame", default="lf", help="資料框格式（同 WEIGHTSTATION_SERIAL_FRAME）")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.capture:
+        with open(args.capture, "rb") as f:
+            data = f.read()
+    else:
+        data = synthetic_capture(args.seconds)
+    sizes = read_sizes(len(data))
+    frame = frame_from_spec(args.frame)
+
+    ring_time, ring_values = best_of(lambda: ring_decode(data, sizes, frame), args.repeat)
+    print(f"資料量: {len(data):,} bytes（115200 baud 約 {len(data) / BYTES_PER_SECOND:.0f} 秒），讀取 {len(sizes):,} 次")
+    if args.frame == "lf":
+        legacy_time, legacy_values = best_of(lambda: legacy_decode(data, sizes), args.repeat)
+        if legacy_values != ring_values:
+            print(f"✗ 解碼結果不一致（原本 {len(legacy_values)} 筆，環形緩衝區 {len(ring_values)} 筆）")
+            sys.exit(1)
+        print(f"原本 reader_thread: {legacy_time * 1000:10.1f} ms  ({len(data) / legacy_time / 1e6:6.2f} MB/s)")
+    print(f"ScaleDecoder:       {ring_time * 1000:10.1f} ms  ({len(data) / ring_time / 1e6:6.2f} MB/s)")
+    print(f"解析筆數: {len(ring_values):,}，相對 115200 baud 的餘裕: {len(data) / ring_time / BYTES_PER_SECOND:.0f}x")
+    if args.frame == "lf":
+        print(f"加速倍數: {legacy_time / ring_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+啟動時間測試：匯入 main 的時間（-X importtime）與主視窗第一次繪製的時間，超出預算時回傳非 0
+
+每次都啟動新的 Python 行程，工作目錄為暫存資料夾（資料庫從空白建立）。
+第一次繪製：從啟動行程到主視窗 <Map> 並處理完待繪製工作；
+資料就緒：背景初始化完成、當日交易載入之後。沒有顯示器時只檢查匯入時間。
+
+用法：
+    python benchmarks/bench_startup.py [--runs 5] [--import-budget-ms 150] [--paint-budget-ms 1500]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAINT_SCRIPT = r"""
+import time
+import main
+
+root = main.create_app()
+state = {}
+
+def on_map(event):
+    if event.widget is root and "paint" not in state:
+        root.update_idletasks()
+        state["paint"] = time.time()
+        wait_for_data()
+
+def wait_for_data():
+    # 背景載入完成且主執行緒已載入當日交易（StartupLoader 結束後的下一輪）
+    if main._data_loaded and not any(t.name == "StartupLoader" for t in main.threading.enumerate()):
+        root.after(50, finish)
+    else:
+        root.after(10, wait_for_data)
+
+def finish():
+    print(state["paint"], time.time(), flush=True)
+    main.cleanup_resources()
+    root.destroy()
+
+root.bind("<Map>", on_map)
+root.mainloop()
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def parse_importtime(stderr):
+    """回傳 {模組: 累計微秒}（只取最外層名稱相同的第一筆）"""
+    result = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        result.setdefault(name, int(parts[1]))
+    return result
+
+
+def measure_import(workdir):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=workdir, env=child_env(), capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(proc.stderr)
+
+
+def measure_paint(workdir):
+    """回傳 (第一次繪製秒數, 資料就緒秒數)，沒有顯示器時回傳 None"""
+    started = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-c", PAINT_SCRIPT],
+        cwd=workdir, env=child_env(), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        if "TclError" in proc.stderr:
+            return None
+        raise RuntimeError(proc.stderr)
+    painted, ready = (float(v) for v in proc.stdout.strip().splitlines()[-1].split())
+    return painted - started, ready - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=150.0)
+    parser.add_argument("--paint-budget-ms", type=float, default=1500.0)
+    args = parser.parse_args()
+
+    import_times = []
+    paint_times = []
+    ready_times = []
+    last_imports = {}
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as workdir:
+            last_imports = measure_import(workdir)
+            import_times.append(last_imports.get("main", 0) / 1000)
+            paint = measure_paint(workdir)
+            if paint is not None:
+                paint_times.append(paint[0] * 1000)
+                ready_times.append(paint[1] * 1000)
+
+    over_budget = False
+    import_ms = statistics.median(import_times)
+    print(f"匯入 main：中位數 {import_ms:.1f} ms（預算 {args.import_budget_ms:g} ms，{args.runs} 次）")
+    over_budget |= import_ms > args.import_budget_ms
+
+    slowest = sorted(
+        ((name, us) for name, us in last_imports.items() if name != "main"),
+        key=lambda item: item[1], reverse=True,
+    )[:8]
+    print("  累計最久的模組：" + "，".join(f"{name} {us / 1000:.1f} ms" for name, us in slowest))
+
+    if paint_times:
+        paint_ms = statistics.median(paint_times)
+        print(f"第一次繪製：中位數 {paint_ms:.0f} ms（預算 {args.paint_budget_ms:g} ms）")
+        print(f"資料就緒：中位數 {statistics.median(ready_times):.0f} ms")
+        over_budget |= paint_ms > args.paint_budget_ms
+    else:
+        print("第一次繪製：沒有顯示器，略過")
+
+    if over_budget:
+        print("✗ 超出啟動時間預算")
+        raise SystemExit(1)
+    print("✓ 符合啟動時間預算")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+磅單作業吞吐量測試：不啟動 Tk，直接以 TicketEngine 完成整張磅單的流程
+
+每張磅單：新增交易 → 選擇商品 → 輸入重車、空車、扣重 → 再加一個品項並輸入 → 結帳，
+最後比對記憶體中的當日合計與重新從資料庫載入的結果。
+
+用法：
+    python benchmarks/bench_ticket_engine.py [--tickets 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Migrations import migrate_stock_database
+from StockDB import close_all_connections, tune_stock_database
+from TicketEngine import TicketEngine, TicketLockedError
+
+DAY = "2024-01-15"
+
+
+def run_ticket(engine, n):
+    record = engine.create_ticket(name=f"客戶{n % 50}", carno=f"ABC-{n % 10000:04d}")
+    engine.set_item_product(record, 0, "鐵", 8.5)
+    engine.set_item_value(record, 0, "heavy", 15000 + n % 500)
+    engine.set_item_value(record, 0, "empty", 8000)
+    engine.set_item_value(record, 0, "minus", 12.5)
+    engine.add_item(record)
+    engine.set_item_product(record, 1, "銅", 120.0)
+    engine.set_item_value(record, 1, "heavy", 9000)
+    engine.set_item_value(record, 1, "empty", 8000)
+    engine.checkout(record)
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stockinhand.db")
+        migrate_stock_database(path, progress=lambda *args: None)
+        tune_stock_database(path)
+        engine = TicketEngine(db_path=path, date=DAY)
+
+        start = time.perf_counter()
+        for n in range(args.tickets):
+            record = run_ticket(engine, n)
+        elapsed = time.perf_counter() - start
+
+        try:
+            engine.add_item(record)
+            raise SystemExit("已結帳的交易不應可再新增品項")
+        except TicketLockedError:
+            pass
+
+        day_netw, day_total = engine.store.day_netw, engine.store.day_total
+        reloaded = engine.load_day(DAY)
+        close_all_connections()
+
+    print(f"磅單 {args.tickets:,} 張，每張 10 次寫入（含結帳）")
+    print(f"耗時 {elapsed:.2f} 秒：{args.tickets / elapsed:,.0f} 張/秒，{args.tickets * 10 / elapsed:,.0f} 次寫入/秒")
+    print(f"當日淨重 {day_netw:,.1f}，交易額 {day_total:,.1f}")
+    same = (len(reloaded), round(reloaded.day_netw, 3), round(reloaded.day_total, 3)) == (
+        args.tickets, round(day_netw, 3), round(day_total, 3))
+    print(f"重新載入比對：{'一致' if same else '不一致'}")
+    if not same:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,71 +1,126 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from InfoSet import create_info_frame
-from AddCargo import CargoInputFrame, CustomerFrame
-from NoPad import NumericKeypad
+from StockDB import get_connection, close_all_connections, close_thread_connections, tune_stock_database, load_day_records, count_range_records, fetch_range_records
+from Migrations import migrate_stock_database
+from TicketStore import TicketStore
+from TicketEngine import TicketEngine, join_carno
+from VirtualList import VirtualTreeview, StoreSource, QuerySource
+from StartupSnapshot import read_snapshot, records_key, write_snapshot
+from AppLogging import setup_logging
 import sqlite3
 import os
-import re
 import threading
 import gc
+import logging
+import time
 from datetime import datetime, timedelta
 import sys
 
+log = logging.getLogger(__name__)
+
 # PyInstaller 應用路徑修復
 # 當應用由 PyInstaller 打包執行時，需要將工作目錄設置為資源目錄
 if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
     # PyInstaller 打包的應用
     os.chdir(sys._MEIPASS)
-    print(f"[PyInstaller] 工作目錄已設置為: {os.getcwd()}")
+    log.info("[PyInstaller] 工作目錄已設置為: %s", os.getcwd())
 
 # 宣告可擴充式陣列（全域，供其他模組匯入使用）
 CustomerID = []  # 儲存客戶ID（文字格式）
 ItemValue = {}  # 儲存項目名稱和價格：{"項目名稱": 價格(float)}
-StockInHand = []  # 儲存與 stockinhand.db 相同欄位結構的紀錄陣列 (list of dict)
-_data_loaded = False  # 標記是否已初始化過資料
+StockInHand = TicketStore()  # 儲存與 stockinhand.db 相同欄位結構的紀錄（以 number/id 索引，依 number 降冪）
+_data_loaded = False  # 標記是否已載入客戶/商品資料（只在 Tk 主執行緒設定）
+_databases_ready = False  # 標記是否已建立/遷移資料庫
+_data_lock = threading.Lock()  # 背景初始化與視窗操作可能同時呼叫 ensure_databases_once
 today = datetime.now().strftime("%Y-%m-%d")  # 目前選擇的日期（全域）
+engine = TicketEngine(store=StockInHand, date=today)  # 交易/品項/結帳操作（不依賴 Tk）
 checkout_click_count = {}  # 追蹤每筆資料的結帳點擊次數 {number: count}
-active_threads = []  # 追蹤活躍的執行緒
+scale_registry = None  # 常駐的磅秤讀取服務（每個車道一台，start_scale_services 啟動）
+RS232_DISPLAY_INTERVAL_MS = 100  # RS232 視窗更新讀數的間隔（約 10 Hz）
+RS232_AUTO_CAPTURE = os.environ.get("WEIGHTSTATION_AUTO_CAPTURE") == "1"  # 讀數穩定時自動確認
+SNAPSHOT_DELAY_MS = 2000  # 資料異動後延遲寫入啟動快照的時間
+RANGE_DEFAULT_DAYS = 90  # 區間查詢預設的起始日（今天往前的天數）
 
 # 資料庫載入函式
+def read_customer_data():
+    """從 CustomerID.db 讀取客戶名稱 list（可在背景執行緒呼叫）"""
+    try:
+        cursor = get_connection("CustomerID.db").execute("SELECT name FROM customers ORDER BY id")
+        customers = [row[0] for row in cursor.fetchall()]
+        log.info("已載入 %d 筆客戶資料", len(customers))
+        log.debug("客戶資料: %s", customers)
+        return customers
+    except sqlite3.OperationalError:
+        log.error("無法連接 CustomerID.db，請先執行 create_databases.py")
+        return []
+
+def read_item_data():
+    """從 ItemValue.db 讀取 {商品名稱: 價格}（可在背景執行緒呼叫）"""
+    try:
+        cursor = get_connection("ItemValue.db").execute("SELECT name, price FROM items")
+        items = {row[0]: row[1] for row in cursor.fetchall()}
+        log.info("已載入 %d 筆商品資料", len(items))
+        log.debug("商品資料: %s", items)
+        return items
+    except sqlite3.OperationalError:
+        log.error("無法連接 ItemValue.db，請先執行 create_databases.py")
+        return {}
+
 def load_customer_data():
     """從 CustomerID.db 載入客戶名稱至 CustomerID 陣列"""
     global CustomerID
-    try:
-        conn = sqlite3.connect("CustomerID.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM customers ORDER BY id")
-        CustomerID = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        print(f"✓ 已載入 {len(CustomerID)} 筆客戶資料: {CustomerID}")
-    except sqlite3.OperationalError:
-        print("✗ 無法連接 CustomerID.db，請先執行 create_databases.py")
-        CustomerID = []
+    CustomerID = read_customer_data()
 
 def load_item_data():
     """從 ItemValue.db 載入商品名稱與價格至 ItemValue 字典"""
     global ItemValue
-    try:
-        conn = sqlite3.connect("ItemValue.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT name, price FROM items")
-        ItemValue = {row[0]: row[1] for row in cursor.fetchall()}
-        conn.close()
-        print(f"✓ 已載入 {len(ItemValue)} 筆商品資料: {ItemValue}")
-    except sqlite3.OperationalError:
-        print("✗ 無法連接 ItemValue.db，請先執行 create_databases.py")
-        ItemValue = {}
+    ItemValue = read_item_data()
+
+
+def set_catalog(customers, items):
+    """以載入的客戶/商品資料取代全域目錄並標記已初始化（只在 Tk 主執行緒呼叫）"""
+    global CustomerID, ItemValue, _data_loaded
+    CustomerID = customers
+    ItemValue = items
+    _data_loaded = True
+
+
+def ensure_databases_once():
+    """建立/遷移資料庫，只執行一次（背景執行中時會等待其完成）"""
+    global _databases_ready
+    with _data_lock:
+        if not _databases_ready:
+            ensure_databases()
+            _databases_ready = True
 
 
 def init_data_once():
-    """模組匯入時初始化資料，只執行一次。"""
-    global _data_loaded
+    """建立/遷移資料庫並載入客戶與商品資料，只執行一次（在 Tk 主執行緒呼叫）"""
     if _data_loaded:
         return
-    ensure_databases()
-    load_customer_data()
-    load_item_data()
-    _data_loaded = True
+    ensure_databases_once()
+    set_catalog(read_customer_data(), read_item_data())
+
+
+def restore_startup_snapshot():
+    """讀取與資料庫檔一致的啟動快照並還原客戶/商品資料，回傳快照（沒有可用的快照時回傳 None）"""
+    global CustomerID, ItemValue
+    snapshot = read_snapshot()
+    if snapshot is None:
+        return None
+    CustomerID = snapshot["customers"]
+    ItemValue = snapshot["items"]
+    return snapshot
+
+
+def save_startup_snapshot():
+    """將目前的客戶/商品資料與當日交易寫入啟動快照（尚未完成初始化時不寫入）"""
+    if not _data_loaded:
+        return
+    try:
+        write_snapshot(CustomerID, ItemValue, today, StockInHand)
+    except (OSError, ValueError) as e:
+        log.warning("無法寫入啟動快照: %s", e)
 
 
 def ensure_databases():
@@ -99,159 +154,48 @@ def ensure_databases():
         conn.commit()
         conn.close()
 
-    if not os.path.exists("stockinhand.db"):
-        conn = sqlite3.connect("stockinhand.db")
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS stockinhand (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                inout INTEGER,
-                date TEXT,
-                number TEXT,
-                name TEXT,
-                carno TEXT,
-                closeflag INTEGER,
-                fluctuation INTEGER
-            )
-            """
-        )
-        # 創建品項詳情表
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS item_details (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                stockinhand_id INTEGER,
-                seq INTEGER,
-                item TEXT,
-                heavy FLOAT,
-                empty FLOAT,
-                grossw FLOAT,
-                minus FLOAT,
-                netw FLOAT,
-                account FLOAT,
-                total FLOAT,
-                price FLOAT,
-                FOREIGN KEY (stockinhand_id) REFERENCES stockinhand(id) ON DELETE CASCADE
-            )
-            """
-        )
-        conn.commit()
-        conn.close()
-    else:
-        # 檢查並升級現有資料庫
-        conn = sqlite3.connect("stockinhand.db")
-        cursor = conn.cursor()
-        
-        # 檢查 stockinhand 表是否有 item 欄位（舊結構）
-        cursor.execute("PRAGMA table_info(stockinhand)")
-        columns = [col[1] for col in cursor.fetchall()]
-        
-        if "item" in columns:
-            # 需要升級資料庫結構
-            print("✓ 偵測到舊的資料庫結構，正在升級...")
-            
-            # 創建新的 stockinhand 表
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS stockinhand_new (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    inout INTEGER,
-                    date TEXT,
-                    number TEXT,
-                    name TEXT,
-                    carno TEXT,
-                    closeflag INTEGER,
-                    fluctuation INTEGER
-                )
-                """
-            )
-            
-            # 創建 item_details 表
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS item_details (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    stockinhand_id INTEGER,
-                    seq INTEGER,
-                    item TEXT,
-                    heavy FLOAT,
-                    empty FLOAT,
-                    grossw FLOAT,
-                    minus FLOAT,
-                    netw FLOAT,
-                    account FLOAT,
-                    total FLOAT,
-                    price FLOAT,
-                    FOREIGN KEY (stockinhand_id) REFERENCES stockinhand(id) ON DELETE CASCADE
-                )
-                """
-            )
-            
-            # 遷移舊資料
-            cursor.execute(
-                """
-                SELECT id, inout, date, number, name, carno, item, heavy, empty, grossw, minus, netw, account, total, price, closeflag, fluctuation
-                FROM stockinhand
-                """
-            )
-            old_records = cursor.fetchall()
-            
-            for record in old_records:
-                rid, inout, rdate, number, name, carno, item, heavy, empty, grossw, minus, netw, account, total, price, closeflag, fluctuation = record
-                
-                # 插入到新的 stockinhand 表
-                cursor.execute(
-                    """
-                    INSERT INTO stockinhand_new (id, inout, date, number, name, carno, closeflag, fluctuation)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (rid, inout, rdate, number, name, carno, closeflag, fluctuation)
-                )
-                
-                # 如果有品項資料，插入到 item_details 表
-                if item:
-                    cursor.execute(
-                        """
-                        INSERT INTO item_details (stockinhand_id, seq, item, heavy, empty, grossw, minus, netw, account, total, price)
-                        VALUES (?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """,
-                        (rid, item, heavy, empty, grossw, minus, netw, account, total, price)
-                    )
-            
-            # 刪除舊表並重命名
-            cursor.execute("DROP TABLE stockinhand")
-            cursor.execute("ALTER TABLE stockinhand_new RENAME TO stockinhand")
-            
-            conn.commit()
-            print("✓ 資料庫升級完成")
-        
-        conn.close()
+    # stockinhand.db 由遷移程式建立與升級（依 user_version 只執行尚未套用的步驟）
+    migrate_stock_database()
+
+    # 開啟 WAL 並補上索引（新建與既有資料庫皆適用，可重複執行）
+    tune_stock_database()
+
+
+def start_scale_services():
+    """啟動常駐的磅秤讀取服務（只啟動一次），所有磅秤共用一個讀取迴圈"""
+    global scale_registry
+    if scale_registry is not None:
+        return scale_registry
+    # 延遲匯入：asyncio 與解碼器只在啟動磅秤服務時才載入
+    from ScaleService import ScaleRegistry
+
+    try:
+        scale_registry = ScaleRegistry.from_environment()
+    except (OSError, ValueError) as e:
+        log.error("磅秤設定錯誤: %s", e)
+        return None
+    scale_registry.start()
+    return scale_registry
 
 
 def cleanup_resources():
     """清理所有資源：執行緒、記憶體、資料庫連接等"""
-    global CustomerID, ItemValue, StockInHand, checkout_click_count, active_threads, _data_loaded
+    global CustomerID, ItemValue, StockInHand, checkout_click_count, scale_registry, _data_loaded, _databases_ready
     
-    print("✓ 開始清理資源...")
-    
-    # 停止所有活躍的執行緒
-    for thread_info in active_threads:
-        if 'stop_event' in thread_info:
-            thread_info['stop_event'].set()
-        if 'serial' in thread_info:
-            try:
-                thread_info['serial'].close()
-                print("✓ 已關閉序列埠連接")
-            except Exception:
-                pass
+    log.info("開始清理資源")
     
-    # 等待執行緒結束（最多等待 1 秒）
-    for thread_info in active_threads:
-        if 'thread' in thread_info:
-            thread_info['thread'].join(timeout=1.0)
+    # 停止磅秤讀取服務並關閉序列埠（最多等待 1 秒）
+    if scale_registry is not None:
+        scale_registry.stop(timeout=1.0)
+        scale_registry = None
+        log.info("已關閉序列埠連接")
     
-    active_threads.clear()
+    # 關閉所有長期資料庫連線
+    close_all_connections()
+    log.info("已關閉資料庫連線")
+
+    # 連線關閉後 WAL 已寫回資料庫檔，此時的檔案狀態即為下次啟動時比對的鍵值
+    save_startup_snapshot()
     
     # 清空全域變數
     CustomerID.clear()
@@ -259,13 +203,13 @@ def cleanup_resources():
     StockInHand.clear()
     checkout_click_count.clear()
     _data_loaded = False
+    _databases_ready = False
     
-    print("✓ 已清空全域資料")
+    log.debug("已清空全域資料")
     
     # 強制執行垃圾回收
     gc.collect()
-    print("✓ 已執行垃圾回收")
-    print("✓ 資源清理完成")
+    log.info("資源清理完成")
 
 
 def create_app():
@@ -289,6 +233,64 @@ def create_app():
     
     # 設置視窗關閉協議
     root.protocol("WM_DELETE_WINDOW", on_closing)
+
+    snapshot_job = None
+
+    def schedule_snapshot():
+        """資料異動後延遲寫入啟動快照（連續操作只寫一次），當機後重開也能直接還原"""
+        nonlocal snapshot_job
+        if snapshot_job is not None:
+            root.after_cancel(snapshot_job)
+
+        def run():
+            nonlocal snapshot_job
+            snapshot_job = None
+            save_startup_snapshot()
+
+        snapshot_job = root.after(SNAPSHOT_DELAY_MS, run)
+
+    diagnostics_win = None
+
+    def open_diagnostics_window(event=None):
+        """磅秤診斷視窗（F12）：每秒更新讀取統計，可匯出成 JSON 檔"""
+        nonlocal diagnostics_win
+        if diagnostics_win is not None and diagnostics_win.winfo_exists():
+            diagnostics_win.lift()
+            return
+        from ScaleTelemetry import format_report, dump_telemetry
+
+        services = list(scale_registry) if scale_registry is not None else []
+
+        diagnostics_win = win = tk.Toplevel(root)
+        win.title("磅秤診斷")
+        win.geometry("720x480")
+        configure_toplevel(win)
+
+        text = tk.Text(win, font=("Courier New", 11), wrap=tk.NONE)
+        text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+
+        def refresh():
+            if not win.winfo_exists():
+                return
+            text.config(state=tk.NORMAL)
+            text.delete("1.0", tk.END)
+            text.insert(tk.END, format_report(services))
+            text.config(state=tk.DISABLED)
+            win.after(1000, refresh)
+
+        def export():
+            path = os.path.abspath(f"diagnostics-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+            try:
+                dump_telemetry(services, path)
+            except OSError as e:
+                messagebox.showerror("錯誤", f"匯出失敗：{e}", parent=win)
+                return
+            messagebox.showinfo("匯出完成", f"已寫入\n{path}", parent=win)
+
+        tk.Button(win, text="匯出", font=("Arial", 12), width=10, command=export).pack(pady=(0, 10))
+        refresh()
+
+    root.bind("<F12>", open_diagnostics_window)
     root.title("Left-Right Frame Layout")
     root.geometry("1200x800")
 
@@ -308,45 +310,55 @@ def create_app():
     top_right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=False)
     top_right_frame.pack_propagate(False)  # 防止內容改變 frame 大小
 
-    # 根據 ItemValue 建立商品按鈕
+    # 商品按鈕依名稱常駐：目錄有增減時才建立/刪除按鈕，點擊後的動作由 item_click_handler 決定
+    item_buttons = {}  # {商品名稱: (按鈕, (x, y))}
+    item_click_handler = None
+
+    def on_item_button(item_name):
+        if item_click_handler is not None:
+            item_click_handler(item_name)
+
     def create_item_buttons(on_click_callback=None):
-        """根據 ItemValue 字典動態生成商品按鈕"""
-        # 清除舊按鈕
-        for widget in top_right_frame.winfo_children():
-            widget.destroy()
-        
-        items = list(ItemValue.keys())
+        """依 ItemValue 同步商品按鈕，只為新增/刪除的商品建立或移除按鈕，其餘只在位置改變時重新擺放"""
+        nonlocal item_click_handler
+        # 每個按鈕固定呼叫 on_item_button，切換動作不需要逐一重新設定 command
+        item_click_handler = on_click_callback
+
+        for item_name in [name for name in item_buttons if name not in ItemValue]:
+            item_buttons.pop(item_name)[0].destroy()
+
         # 固定按鈕尺寸
         button_width = 100  # 固定寬度（像素）
         button_height = 75  # 固定高度（像素）
         padding = 5  # 按鈕間距
         
-        for idx, item_name in enumerate(items):
+        for idx, item_name in enumerate(ItemValue):
             row = idx // 4  # 每行4個按鈕
             col = idx % 4   # 列索引 (0-3)
             
             # 計算按鈕的絕對位置
-            x = col * (button_width + padding) + padding
-            y = row * (button_height + padding) + padding
-            
-            cmd = (lambda name=item_name: on_click_callback(name)) if on_click_callback else None
-            
-            btn = tk.Button(
-                top_right_frame,
-                text=item_name,
-                font=("Arial", 12),
-                bg="lightblue",
-                relief=tk.RAISED,
-                bd=2,
-                command=cmd,
-                width=12,
-                height=2
-            )
-            btn.place(x=x, y=y, width=button_width, height=button_height)
+            position = (col * (button_width + padding) + padding, row * (button_height + padding) + padding)
+
+            entry = item_buttons.get(item_name)
+            if entry is None:
+                btn = tk.Button(
+                    top_right_frame,
+                    text=item_name,
+                    font=("Arial", 12),
+                    bg="lightblue",
+                    relief=tk.RAISED,
+                    bd=2,
+                    command=lambda name=item_name: on_item_button(name),
+                    width=12,
+                    height=2
+                )
+            else:
+                btn, placed_at = entry
+                if placed_at == position:
+                    continue
+            btn.place(x=position[0], y=position[1], width=button_width, height=button_height)
+            item_buttons[item_name] = (btn, position)
     
-    # 首次載入時建立按鈕
-    top_right_frame.after(100, create_item_buttons)
-
     bottom_frame = tk.Frame(left_frame, bg="lightyellow")
     bottom_frame.pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True, padx=10, pady=10)
 
@@ -380,24 +392,12 @@ def create_app():
     # 在 toggle_button 旁邊添加[新增品項]和[刪除品項]按鈕
     def on_add_item():
         """新增一筆空白品項到選中的交易記錄"""
-        selection = top_left_tree.selection()
-        if not selection:
-            messagebox.showinfo("提示", "請先選擇左上表格資料")
-            return
-        
-        item = selection[0]
-        values = top_left_tree.item(item, "values")
-        if not values:
+        selected_key = top_left_list.selected_key()
+        if selected_key is None:
             messagebox.showinfo("提示", "請先選擇左上表格資料")
             return
         
-        selected_number = values[0]
-        selected_record = None
-        for record in StockInHand:
-            if record.get("number") == selected_number:
-                selected_record = record
-                break
-        
+        selected_record = StockInHand.get_by_id(selected_key)
         if not selected_record:
             messagebox.showerror("錯誤", "找不到選取的資料")
             return
@@ -407,37 +407,15 @@ def create_app():
             messagebox.showwarning("提示", "該筆資料已結帳，已被鎖定，無法新增品項")
             return
         
-        # 計算新品項的序列號
-        seq = len(selected_record.get("items", [])) + 1
-        
         try:
-            conn = sqlite3.connect("stockinhand.db")
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO item_details (stockinhand_id, seq, item, price, heavy, empty, grossw, minus, netw, account, total)
-                VALUES (?, ?, '', 0, 0, 0, 0, 0, 0, 0, 0)
-                """,
-                (selected_record.get("id"), seq)
-            )
-            conn.commit()
-            new_item_id = cursor.lastrowid
-            conn.close()
+            engine.add_item(selected_record)
         except sqlite3.OperationalError as e:
             messagebox.showerror("錯誤", f"新增失敗: {e}")
             return
         
-        # 新增到記憶體中
-        selected_record["items"].append((new_item_id, seq, "", 0, 0, 0, 0, 0, 0, 0, 0))
-        
-        # 重新繪製表格並重新選擇
+        # 差異更新表格（選取狀態保留）並刷新品項
         render_stockinhand_tree()
-        for tree_item in top_left_tree.get_children():
-            if top_left_tree.item(tree_item, "values")[0] == selected_number:
-                top_left_tree.selection_set(tree_item)
-                top_left_tree.see(tree_item)
-                on_top_left_tree_select(None)
-                break
+        reselect_ticket(selected_record)
     
     btn_add_item = tk.Button(
         bottom_frame,
@@ -465,31 +443,17 @@ def create_app():
 
     def delete_selected_item():
         """刪除下方表格所選取的品項"""
-        global StockInHand
-        
         table_selection = tree.selection()
         if not table_selection:
             messagebox.showinfo("提示", "請先選擇要刪除的品項")
             return
         
-        selection = top_left_tree.selection()
-        if not selection:
+        selected_key = top_left_list.selected_key()
+        if selected_key is None:
             messagebox.showinfo("提示", "請先選擇左上表格資料")
             return
         
-        item = selection[0]
-        values = top_left_tree.item(item, "values")
-        if not values:
-            messagebox.showinfo("提示", "請先選擇左上表格資料")
-            return
-        
-        selected_number = values[0]
-        selected_record = None
-        for record in StockInHand:
-            if record.get("number") == selected_number:
-                selected_record = record
-                break
-        
+        selected_record = StockInHand.get_by_id(selected_key)
         if not selected_record:
             messagebox.showerror("錯誤", "找不到選取的資料")
             return
@@ -511,9 +475,7 @@ def create_app():
             messagebox.showerror("錯誤", "找不到選中的品項")
             return
         
-        selected_item = items[item_index]
-        item_id = selected_item[0]
-        item_name = selected_item[2]
+        item_name = items[item_index][2]
         
         confirm = messagebox.askyesno(
             "確認刪除",
@@ -526,27 +488,16 @@ def create_app():
             return
         
         try:
-            conn = sqlite3.connect("stockinhand.db")
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM item_details WHERE id = ?", (item_id,))
-            conn.commit()
-            conn.close()
+            # 同時從記憶體中移除，並扣除該品項的淨重與小計
+            engine.delete_item(selected_record, item_index)
         except sqlite3.OperationalError as e:
             messagebox.showerror("錯誤", f"刪除失敗: {e}")
             return
         
-        # 從記憶體中移除
-        selected_record["items"].pop(item_index)
-        
         render_stockinhand_tree()
         
         # 重新選擇同一行
-        for tree_item in top_left_tree.get_children():
-            if top_left_tree.item(tree_item, "values")[0] == selected_number:
-                top_left_tree.selection_set(tree_item)
-                top_left_tree.see(tree_item)
-                on_top_left_tree_select(None)
-                break
+        reselect_ticket(selected_record)
 
     # bottom frame 表格（類似 Excel 的欄位）
     table_frame = ttk.Frame(bottom_frame)
@@ -593,7 +544,7 @@ def create_app():
                     # 先選擇該行
                     tree.selection_set(item)
                     selected_cell_column = col_name
-                    print(f"選中列: {col_name}")
+                    log.debug("選中列: %s", col_name)
     
     def on_tree_double_click(event):
         """處理表格雙擊事件，直接執行修改"""
@@ -609,7 +560,7 @@ def create_app():
                     # 先選擇該行並設定 selected_cell_column
                     tree.selection_set(item)
                     selected_cell_column = col_name
-                    print(f"雙擊列: {col_name}")
+                    log.debug("雙擊列: %s", col_name)
                     
                     # 根據欄位類型執行對應的修改功能
                     if col_name == "品項":
@@ -625,6 +576,8 @@ def create_app():
         infoset_win = tk.Toplevel(root)
         infoset_win.title("資訊設置")
         infoset_win.geometry("700x550")
+        from InfoSet import create_info_frame
+
         result = create_info_frame(infoset_win)
         configure_toplevel(infoset_win)
         infoset_win.transient(root)  # 置於主視窗之上
@@ -636,13 +589,14 @@ def create_app():
         load_item_data()
         load_customer_data()
         create_item_buttons()
-        print("✓ 已重新載入資料並更新商品按鈕")
+        schedule_snapshot()
+        log.info("已重新載入資料並更新商品按鈕")
 
     def open_add_cargo():
         """開啟 AddCargo 視窗為模態視窗"""
         # 確保資料已加載
         init_data_once()
-        print(f"DEBUG: 打開 AddCargo 前，CustomerID = {CustomerID}")
+        log.debug("打開 AddCargo 前，CustomerID = %s", CustomerID)
         
         # 檢查日期是否為當日
         system_date = datetime.now().strftime("%Y-%m-%d")
@@ -752,6 +706,8 @@ def create_app():
         # 第一個標籤頁：車牌輸入
         cargo_frame = tk.Frame(notebook)
         cargo_frame.pack(fill=tk.BOTH, expand=True)
+        from AddCargo import CargoInputFrame, CustomerFrame
+
         cargo_app = CargoInputFrame(cargo_frame, on_cancel_callback=on_cancel_close)
         notebook.add(cargo_frame, text="車牌")
         
@@ -822,7 +778,7 @@ def create_app():
         
         date_win = tk.Toplevel(root)
         date_win.title("選擇日期")
-        date_win.geometry("300x150")
+        date_win.geometry("380x150")
         date_win.resizable(False, False)
         configure_toplevel(date_win)
         
@@ -888,6 +844,13 @@ def create_app():
                   width=10, command=confirm_date).pack(side=tk.LEFT, padx=5)
         tk.Button(btn_frame, text="取消", font=("Arial", 12), bg="#f44336", fg="white",
                   width=10, command=date_win.destroy).pack(side=tk.LEFT, padx=5)
+
+        def open_range_from_picker():
+            date_win.destroy()
+            open_range_view()
+
+        tk.Button(btn_frame, text="區間查詢", font=("Arial", 12), bg="#2196F3", fg="white",
+                  width=10, command=open_range_from_picker).pack(side=tk.LEFT, padx=5)
         
         # 綁定 Enter 鍵
         date_entry.bind("<Return>", lambda e: confirm_date())
@@ -896,6 +859,110 @@ def create_app():
         date_win.grab_set()
         date_win.focus_set()
         root.wait_window(date_win)
+
+    def open_range_view():
+        """
+        區間查詢：以虛擬清單顯示日期區間內的所有交易
+
+        資料來源為 QuerySource，只在捲動到的範圍向資料庫分頁取表頭（交易額由 SQLite 加總），
+        多個月的區間也能立即開啟。雙擊交易切換到該日期並選取該筆交易。
+        """
+        global today
+
+        range_win = tk.Toplevel(root)
+        range_win.title("區間查詢")
+        range_win.geometry("800x600")
+        configure_toplevel(range_win)
+
+        query_frame = tk.Frame(range_win)
+        query_frame.pack(pady=10)
+        start_entry = tk.Entry(query_frame, font=("Arial", 16), justify="center", width=12)
+        start_entry.insert(0, (datetime.strptime(today, "%Y-%m-%d") - timedelta(days=RANGE_DEFAULT_DAYS)).strftime("%Y-%m-%d"))
+        start_entry.pack(side=tk.LEFT, padx=5)
+        tk.Label(query_frame, text="～", font=("Arial", 16)).pack(side=tk.LEFT)
+        end_entry = tk.Entry(query_frame, font=("Arial", 16), justify="center", width=12)
+        end_entry.insert(0, today)
+        end_entry.pack(side=tk.LEFT, padx=5)
+
+        summary_var = tk.StringVar()
+        tk.Label(range_win, textvariable=summary_var, font=("Arial", 14)).pack()
+
+        range_table_frame = ttk.Frame(range_win)
+        range_table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        range_columns = ("日期",) + top_left_columns
+        range_list = VirtualTreeview(range_table_frame, columns=range_columns, height=15)
+        range_tree = range_list.tree
+        for col in range_columns:
+            range_tree.heading(col, text=col)
+            range_tree.column(col, width=100, anchor="center")
+        range_tree.column("日期", width=140)
+        range_tree.tag_configure('evenrow', background='#F0F0F0')
+        range_tree.tag_configure('oddrow', background='#FFFFFF')
+        range_tree.tag_configure('closeflag_row', background='#FFE0E0', foreground='#FF0000', font=("Arial", 20, "bold"))
+
+        range_scrollbar = ttk.Scrollbar(range_table_frame, orient="vertical", command=range_list.yview)
+        range_scrollbar.pack(side=tk.LEFT, fill=tk.Y)
+        range_list.yscrollcommand = range_scrollbar.set
+        range_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        def range_row(idx, record):
+            values, tag = ticket_row(idx, record)
+            return (record.get("date"),) + values, tag
+
+        def run_query():
+            try:
+                start_date = datetime.strptime(start_entry.get().strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+                end_date = datetime.strptime(end_entry.get().strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+            except ValueError:
+                messagebox.showerror("錯誤", "日期格式不正確，請使用 YYYY-MM-DD 格式", parent=range_win)
+                return
+            if start_date > end_date:
+                start_date, end_date = end_date, start_date
+            conn = get_connection()
+            try:
+                source = QuerySource(
+                    lambda: count_range_records(conn, start_date, end_date),
+                    lambda limit, offset: fetch_range_records(conn, start_date, end_date, limit, offset),
+                    range_row,
+                )
+                range_list.clear_selection()
+                range_list.set_source(source)
+            except sqlite3.Error as e:
+                log.error("區間查詢失敗: %s", e)
+                messagebox.showerror("錯誤", f"查詢失敗: {e}", parent=range_win)
+                return
+            summary_var.set(f"{start_date} ～ {end_date}　共 {len(source):,} 筆交易")
+
+        def open_selected_day(event):
+            """雙擊：切換到該筆交易的日期並選取"""
+            global today
+            key = range_list.selected_key()
+            if key is None or range_list.source is None:
+                return "break"
+            index = range_list.source.index_of_key(key)
+            if index < 0:
+                return "break"
+            record_date = range_list.source.record(index).get("date")
+            range_win.destroy()
+            today = record_date
+            date_label.config(text=today)
+            load_today_records()
+            selected_record = StockInHand.get_by_id(key)
+            if selected_record is not None:
+                reselect_ticket(selected_record)
+            return "break"
+
+        range_tree.bind("<Double-Button-1>", open_selected_day)
+        tk.Button(query_frame, text="查詢", font=("Arial", 12), bg="#4caf50", fg="white",
+                  width=8, command=run_query).pack(side=tk.LEFT, padx=5)
+        start_entry.bind("<Return>", lambda e: run_query())
+        end_entry.bind("<Return>", lambda e: run_query())
+        run_query()
+
+        range_win.transient(root)
+        range_win.grab_set()
+        range_win.focus_set()
+        root.wait_window(range_win)
     
     # 綁定點擊事件
     date_label.bind("<Button-1>", lambda e: open_date_picker())
@@ -905,7 +972,9 @@ def create_app():
     top_left_table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
 
     top_left_columns = ("編號", "車牌", "廠商", "交易額")
-    top_left_tree = ttk.Treeview(top_left_table_frame, columns=top_left_columns, show="headings", height=8)
+    # 虛擬清單：只實體化可見範圍的列，資料來源為 StockInHand
+    top_left_list = VirtualTreeview(top_left_table_frame, columns=top_left_columns, height=8)
+    top_left_tree = top_left_list.tree
 
     for col in top_left_columns:
         top_left_tree.heading(col, text=col)
@@ -923,37 +992,24 @@ def create_app():
     style.configure("Treeview", font=("Arial", 20), rowheight=25)
 
     # 添加左側垂直滾動條
-    top_left_scrollbar = ttk.Scrollbar(top_left_table_frame, orient="vertical", command=top_left_tree.yview)
+    top_left_scrollbar = ttk.Scrollbar(top_left_table_frame, orient="vertical", command=top_left_list.yview)
     top_left_scrollbar.pack(side=tk.LEFT, fill=tk.Y)
-    top_left_tree.configure(yscrollcommand=top_left_scrollbar.set)
+    top_left_list.yscrollcommand = top_left_scrollbar.set
     top_left_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
     def on_top_left_tree_select(event):
         """當點選 top_left_tree 的一行時，顯示詳細資料到 table_frame 的樹"""
         nonlocal selected_cell_column
         
-        selection = top_left_tree.selection()
-        if not selection:
+        selected_key = top_left_list.selected_key()
+        if selected_key is None:
             return
         
         # 重置 selected_cell_column
         selected_cell_column = None
         
-        # 獲取選中行的值
-        item = selection[0]
-        values = top_left_tree.item(item, 'values')
-        if not values:
-            return
-        
-        # 第一個值是 number
-        selected_number = values[0]
-        
-        # 在 StockInHand 中找到對應的記錄
-        selected_record = None
-        for record in StockInHand:
-            if record.get("number") == selected_number:
-                selected_record = record
-                break
+        # 在 StockInHand 中以 id 索引找到對應的記錄
+        selected_record = StockInHand.get_by_id(selected_key)
         
         if not selected_record:
             return
@@ -962,19 +1018,15 @@ def create_app():
         for tree_item in tree.get_children():
             tree.delete(tree_item)
         
-        # 顯示所有品項
+        # 顯示所有品項（淨重與小計取自記錄中快取的 amounts）
         items = selected_record.get("items", [])
+        amounts = selected_record.get("amounts", [])
         for idx, item_row in enumerate(items):
             item_id, seq, item_name, heavy, empty, grossw, minus, netw, account, total, price = item_row
-            
-            # 計算淨重：貨重 - 扣重
+            netw_val, account_val = amounts[idx]
             grossw_val = grossw if grossw else 0.0
             minus_val = minus if minus else 0.0
-            netw_val = grossw_val - minus_val
-            
-            # 小計 = 淨重 × 價格
             price_val = price if price else 0.0
-            account_val = netw_val * price_val
             
             # 插入記錄的詳細資料
             tag = 'evenrow' if idx % 2 == 0 else 'oddrow'
@@ -994,8 +1046,8 @@ def create_app():
                 tags=(tag,)
             )
     
-    # 綁定 top_left_tree 的點擊事件
-    top_left_tree.bind("<<TreeviewSelect>>", on_top_left_tree_select)
+    # 綁定 top_left_list 的選取事件（使用者選取不同列時觸發）
+    top_left_tree.bind("<<ListSelect>>", on_top_left_tree_select)
 
     def on_top_left_tree_double_click(event):
         """雙擊僅選取，不觸發其他行為"""
@@ -1006,128 +1058,50 @@ def create_app():
 
     top_left_tree.bind("<Double-Button-1>", on_top_left_tree_double_click)
 
+    def ticket_row(idx, record):
+        """回傳交易記錄在左上表格的 (values, tag)"""
+        tag = 'evenrow' if idx % 2 == 0 else 'oddrow'
+        # 如果 closeflag=1，添加紅色字體標籤
+        if record.get('closeflag') == 1:
+            tag = 'closeflag_row'
+        values = (
+            record.get("number"),
+            record.get("carno"),
+            record.get("name"),
+            f"{round(record.get('total', 0.0)):,}",
+        )
+        return values, tag
+
+    top_left_list.set_source(StoreSource(StockInHand, ticket_row))
+
     def render_stockinhand_tree():
-        """依 StockInHand 內容更新左上表格"""
-        # 先清除所有選取狀態，防止選取狀態錯亂
-        top_left_tree.selection_remove(top_left_tree.selection())
-        
-        # 刪除所有項目
-        for item in top_left_tree.get_children():
-            top_left_tree.delete(item)
+        """依 StockInHand 內容更新左上表格：只改寫可見範圍內有變動的列，保留選取狀態"""
+        top_left_list.refresh()
+        schedule_snapshot()
 
-        # 重新插入所有項目
-        for idx, record in enumerate(StockInHand):
-            tag = 'evenrow' if idx % 2 == 0 else 'oddrow'
-            # 如果 closeflag=1，添加紅色字體標籤
-            if record.get('closeflag') == 1:
-                tag = 'closeflag_row'
-            top_left_tree.insert(
-                "",
-                "end",
-                values=(
-                    record.get("number"),
-                    record.get("carno"),
-                    record.get("name"),
-                    f"{round(record.get('total', 0.0)):,}",
-                ),
-                tags=(tag,)
-            )
+    def reselect_ticket(record):
+        """確保交易記錄仍為選取狀態並捲動到可見範圍，再更新下方品項表格"""
+        top_left_list.select_key(record.get("id"))
+        top_left_list.see_key(record.get("id"))
+        on_top_left_tree_select(None)
 
     # 載入今天的交易記錄
     def load_today_records():
         """從 stockinhand.db 載入今天的交易記錄到 StockInHand，並依 number 降冪顯示"""
-        global StockInHand
         try:
-            conn = sqlite3.connect("stockinhand.db")
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT id, inout, date, number, name, carno, closeflag, fluctuation
-                FROM stockinhand
-                WHERE date = ?
-                """,
-                (today,),
-            )
-            rows = cursor.fetchall()
-            conn.close()
-
-            # 將查詢結果轉成 dict 並存入全域陣列
-            StockInHand = []
-            for row in rows:
-                (
-                    rid,
-                    inout,
-                    rdate,
-                    number,
-                    name,
-                    carno,
-                    closeflag,
-                    fluctuation,
-                ) = row
-                
-                # 加載該交易的所有品項
-                conn = sqlite3.connect("stockinhand.db")
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT id, seq, item, heavy, empty, grossw, minus, netw, account, total, price
-                    FROM item_details
-                    WHERE stockinhand_id = ?
-                    ORDER BY seq
-                    """,
-                    (rid,)
-                )
-                item_rows = cursor.fetchall()
-                conn.close()
-                
-                # 計算總交易額（所有品項的 淨重 × 價格 加總）
-                total_account = 0.0
-                for item_row in item_rows:
-                    grossw_val = item_row[5] if item_row[5] else 0.0  # grossw
-                    minus_val = item_row[6] if item_row[6] else 0.0  # minus
-                    netw_val = grossw_val - minus_val  # 動態計算淨重
-                    price_val = item_row[10] if item_row[10] else 0.0  # price
-                    total_account += netw_val * price_val
-                
-                record = {
-                    "id": rid,
-                    "inout": inout,
-                    "date": rdate,
-                    "number": number,
-                    "name": name,
-                    "carno": carno,
-                    "items": item_rows,  # 存儲品項列表
-                    "total": total_account,
-                    "closeflag": closeflag,
-                    "fluctuation": fluctuation,
-                }
-                StockInHand.append(record)
-
-            # 依 number 降冪排序
-            StockInHand.sort(key=lambda r: r.get("number") or "", reverse=True)
+            # 表頭與品項以同一個連線一次載入，並已依 number 降冪排序
+            engine.load_day(today)
 
-            render_stockinhand_tree()
+            top_left_list.clear_selection()
+            schedule_snapshot()
 
-            print(f"✓ 已載入 {len(StockInHand)} 筆今日交易記錄 ({today})，並完成排序")
+            log.info("已載入 %d 筆今日交易記錄 (%s)，當日交易額 %s", len(StockInHand), today, f"{round(StockInHand.day_total):,}")
         except sqlite3.OperationalError as e:
-            print(f"✗ 無法連接 stockinhand.db: {e}")
+            log.error("無法連接 stockinhand.db: %s", e)
 
-    def add_stockinhand_record(cargo_frame_app, customer_frame_app):
-        """新增一筆 stockinhand 記錄，寫入陣列與資料庫"""
-        global StockInHand
-
-        entry1, entry2 = cargo_frame_app.get_entry_values()
-        entry1 = (entry1 or "").strip()
-        entry2 = (entry2 or "").strip()
-
-        if entry1 and entry2:
-            carno = f"{entry1}-{entry2}"
-        elif entry1:
-            carno = entry1
-        elif entry2:
-            carno = entry2
-        else:
-            carno = ""
+    def read_cargo_inputs(cargo_frame_app, customer_frame_app):
+        """從 AddCargo 的輸入框取得 (廠商, 車牌)"""
+        carno = join_carno(*cargo_frame_app.get_entry_values())
 
         display_text = (customer_frame_app.get_display_text() or "").strip()
         if not display_text or display_text == "未選擇客戶":
@@ -1136,158 +1110,42 @@ def create_app():
             name = display_text.replace("已選擇:", "", 1).strip()
         else:
             name = display_text
+        return name, carno
 
-        def to_int(value):
-            try:
-                return int(str(value))
-            except Exception:
-                return 0
-
-        max_num = 0
-        for record in StockInHand:
-            max_num = max(max_num, to_int(record.get("number")))
-        next_number = str(max_num + 1).zfill(3)
-
-        new_record = {
-            "id": None,
-            "inout": 0,
-            "date": today,
-            "number": next_number,
-            "name": name,
-            "carno": carno,
-            "items": [],
-            "total": 0.0,
-            "closeflag": 0,
-            "fluctuation": 0,
-        }
-
+    def add_stockinhand_record(cargo_frame_app, customer_frame_app):
+        """新增一筆 stockinhand 記錄，寫入陣列與資料庫"""
+        name, carno = read_cargo_inputs(cargo_frame_app, customer_frame_app)
         try:
-            conn = sqlite3.connect("stockinhand.db")
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO stockinhand (
-                    inout, date, number, name, carno,
-                    closeflag, fluctuation
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    new_record["inout"],
-                    new_record["date"],
-                    new_record["number"],
-                    new_record["name"],
-                    new_record["carno"],
-                    new_record["closeflag"],
-                    new_record["fluctuation"],
-                ),
-            )
-            new_record["id"] = cursor.lastrowid
-            conn.commit()
-            conn.close()
-        except sqlite3.OperationalError as e:
-            print(f"✗ 無法寫入 stockinhand.db: {e}")
+            engine.create_ticket(name=name, carno=carno)
+        except sqlite3.Error as e:
+            log.error("無法寫入 stockinhand.db: %s", e)
             return
-
-        # 自動為新交易創建第一個空白品項
-        try:
-            conn = sqlite3.connect("stockinhand.db")
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO item_details (stockinhand_id, seq, item, price, heavy, empty, grossw, minus, netw, account, total)
-                VALUES (?, 1, '', 0, 0, 0, 0, 0, 0, 0, 0)
-                """,
-                (new_record["id"],)
-            )
-            conn.commit()
-            first_item_id = cursor.lastrowid
-            conn.close()
-            # 添加到記憶體中
-            new_record["items"].append((first_item_id, 1, "", 0, 0, 0, 0, 0, 0, 0, 0))
-        except sqlite3.OperationalError as e:
-            print(f"✗ 無法為新交易創建品項: {e}")
-        
-        StockInHand.append(new_record)
-        StockInHand.sort(key=lambda r: r.get("number") or "", reverse=True)
         render_stockinhand_tree()
 
     def update_stockinhand_record(selected_record, cargo_frame_app, customer_frame_app):
         """更新車牌與廠商資料"""
-        global StockInHand
-
-        entry1, entry2 = cargo_frame_app.get_entry_values()
-        entry1 = (entry1 or "").strip()
-        entry2 = (entry2 or "").strip()
-
-        if entry1 and entry2:
-            carno = f"{entry1}-{entry2}"
-        elif entry1:
-            carno = entry1
-        elif entry2:
-            carno = entry2
-        else:
-            carno = ""
-
-        display_text = (customer_frame_app.get_display_text() or "").strip()
-        if not display_text or display_text == "未選擇客戶":
-            name = ""
-        elif display_text.startswith("已選擇:"):
-            name = display_text.replace("已選擇:", "", 1).strip()
-        else:
-            name = display_text
-
+        name, carno = read_cargo_inputs(cargo_frame_app, customer_frame_app)
+        record = StockInHand.get(selected_record.get("number")) or selected_record
         try:
-            conn = sqlite3.connect("stockinhand.db")
-            cursor = conn.cursor()
-            if selected_record.get("id") is not None:
-                cursor.execute(
-                    "UPDATE stockinhand SET name = ?, carno = ? WHERE id = ?",
-                    (name, carno, selected_record.get("id")),
-                )
-            else:
-                cursor.execute(
-                    "UPDATE stockinhand SET name = ?, carno = ? WHERE number = ? AND date = ?",
-                    (name, carno, selected_record.get("number"), selected_record.get("date")),
-                )
-            conn.commit()
-            conn.close()
+            engine.update_ticket(record, name, carno)
         except sqlite3.OperationalError as e:
             messagebox.showerror("錯誤", f"更新失敗: {e}")
             return
 
-        for record in StockInHand:
-            if record.get("number") == selected_record.get("number"):
-                record["name"] = name
-                record["carno"] = carno
-                break
-
         render_stockinhand_tree()
 
     def delete_selected_record():
         """刪除左上表格所選取的交易記錄"""
-        global StockInHand
-        
-        selection = top_left_tree.selection()
-        if not selection:
-            messagebox.showinfo("提示", "請先選擇要刪除的資料")
-            return
-
-        item = selection[0]
-        values = top_left_tree.item(item, "values")
-        if not values:
+        selected_key = top_left_list.selected_key()
+        if selected_key is None:
             messagebox.showinfo("提示", "請先選擇要刪除的資料")
             return
 
-        selected_number = values[0]
-        selected_record = None
-        for record in StockInHand:
-            if record.get("number") == selected_number:
-                selected_record = record
-                break
-
+        selected_record = StockInHand.get_by_id(selected_key)
         if not selected_record:
             messagebox.showerror("錯誤", "找不到選取的資料")
             return
+        selected_number = selected_record.get("number")
         
         # 檢查 closeflag，如果為 1 則不允許刪除
         if selected_record.get('closeflag') == 1:
@@ -1306,31 +1164,21 @@ def create_app():
             return
 
         try:
-            conn = sqlite3.connect("stockinhand.db")
-            cursor = conn.cursor()
-            if selected_record.get("id") is not None:
-                cursor.execute("DELETE FROM stockinhand WHERE id = ?", (selected_record.get("id"),))
-            else:
-                cursor.execute(
-                    "DELETE FROM stockinhand WHERE number = ? AND date = ?",
-                    (selected_record.get("number"), selected_record.get("date")),
-                )
-            conn.commit()
-            conn.close()
+            engine.delete_ticket(selected_record)
         except sqlite3.OperationalError as e:
             messagebox.showerror("錯誤", f"刪除失敗: {e}")
             return
 
-        StockInHand = [r for r in StockInHand if r.get("number") != selected_number]
-        render_stockinhand_tree()
+        top_left_list.clear_selection()
+        schedule_snapshot()
 
         for tree_item in tree.get_children():
             tree.delete(tree_item)
 
     def open_edit_cargo():
         """選取左上表格後，開啟 AddCargo 修改車牌與廠商"""
-        selection = top_left_tree.selection()
-        if not selection:
+        selected_key = top_left_list.selected_key()
+        if selected_key is None:
             messagebox.showinfo("提示", "請先選擇左上表格資料")
             return
 
@@ -1338,19 +1186,7 @@ def create_app():
             messagebox.showinfo("提示", "請先取消下方表格選取")
             return
 
-        item = selection[0]
-        values = top_left_tree.item(item, "values")
-        if not values:
-            messagebox.showinfo("提示", "請先選擇左上表格資料")
-            return
-
-        selected_number = values[0]
-        selected_record = None
-        for record in StockInHand:
-            if record.get("number") == selected_number:
-                selected_record = record
-                break
-
+        selected_record = StockInHand.get_by_id(selected_key)
         if not selected_record:
             messagebox.showerror("錯誤", "找不到選取的資料")
             return
@@ -1378,6 +1214,8 @@ def create_app():
 
         cargo_frame = tk.Frame(notebook)
         cargo_frame.pack(fill=tk.BOTH, expand=True)
+        from AddCargo import CargoInputFrame, CustomerFrame
+
         cargo_app = CargoInputFrame(cargo_frame, on_cancel_callback=on_cancel_close)
         notebook.add(cargo_frame, text="車牌")
 
@@ -1415,24 +1253,12 @@ def create_app():
             messagebox.showinfo("提示", "請先點擊要修改的數值欄位（價格、重車、空車或扣重）")
             return
         
-        selection = top_left_tree.selection()
-        if not selection:
+        selected_key = top_left_list.selected_key()
+        if selected_key is None:
             messagebox.showinfo("提示", "請先選擇左上表格資料")
             return
         
-        item = selection[0]
-        values = top_left_tree.item(item, "values")
-        if not values:
-            messagebox.showinfo("提示", "請先選擇左上表格資料")
-            return
-        
-        selected_number = values[0]
-        selected_record = None
-        for record in StockInHand:
-            if record.get("number") == selected_number:
-                selected_record = record
-                break
-        
+        selected_record = StockInHand.get_by_id(selected_key)
         if not selected_record:
             messagebox.showerror("錯誤", "找不到選取的資料")
             return
@@ -1487,278 +1313,101 @@ def create_app():
         def apply_numeric_update(float_value):
             nonlocal selected_cell_column
             try:
-                # 將 heavy, empty 四舍五入到整數
-                if field_key in ("heavy", "empty"):
-                    float_value = round(float_value)
-            except ValueError:
+                # 重車、空車四捨五入為整數並重算貨重；交易與當日總額以差額更新
+                engine.set_item_value(selected_record, item_index, field_key, float_value)
+            except (TypeError, ValueError):
                 messagebox.showerror("錯誤", "請輸入有效的數值")
                 return
-
-            try:
-                conn = sqlite3.connect("stockinhand.db")
-                cursor = conn.cursor()
-                cursor.execute(
-                    f"UPDATE item_details SET {field_key} = ? WHERE id = ?",
-                    (float_value, item_id)
-                )
-                conn.commit()
-                conn.close()
             except sqlite3.OperationalError as e:
                 messagebox.showerror("錯誤", f"更新失敗: {e}")
                 return
 
-            # 更新記憶體中的值
-            heavy_val = heavy if field_key != "heavy" else float_value
-            empty_val = empty if field_key != "empty" else float_value
-            minus_val = minus if field_key != "minus" else float_value
-            price_val = price if field_key != "price" else float_value
-
-            # 自動計算 grossw
-            global active_threads
-            
-            grossw_val = heavy_val - empty_val
-            if grossw_val < 0:
-                grossw_val = 0.0
-            grossw_val = round(grossw_val)
-
-            # 更新資料庫中的 grossw
-            if field_key in ("heavy", "empty"):
-                try:
-                    conn = sqlite3.connect("stockinhand.db")
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        "UPDATE item_details SET grossw = ? WHERE id = ?",
-                        (grossw_val, item_id)
-                    )
-                    conn.commit()
-                    conn.close()
-                except sqlite3.OperationalError as e:
-                    print(f"✗ 更新 grossw 失败: {e}")
-
-            # 更新記憶體中的項目
-            items[item_index] = (item_id, seq, item_name, heavy_val, empty_val, grossw_val, minus_val, netw, account, total, price_val)
-
-            # 重新計算交易的總額
-            total_account = 0.0
-            for item_row in items:
-                item_grossw = item_row[5] if item_row[5] else 0.0
-                item_minus = item_row[6] if item_row[6] else 0.0
-                item_netw = item_grossw - item_minus
-                item_price = item_row[10] if item_row[10] else 0.0
-                total_account += item_netw * item_price
-            selected_record["total"] = total_account
-
-            # 保存當前選中的編號以便重新選擇
-            selected_number = selected_record.get("number")
             render_stockinhand_tree()
 
             # 重新選擇同一行
-            for tree_item in top_left_tree.get_children():
-                if top_left_tree.item(tree_item, "values")[0] == selected_number:
-                    top_left_tree.selection_set(tree_item)
-                    top_left_tree.see(tree_item)
-                    on_top_left_tree_select(None)
-                    break
+            reselect_ticket(selected_record)
 
             selected_cell_column = None
 
         def open_rs232_dialog():
             nonlocal selected_cell_column
-            try:
-                import serial
-                from serial.tools import list_ports
-            except ImportError as e:
-                messagebox.showerror("錯誤", f"未安裝 pyserial，無法讀取 RS232\n請執行：pip install pyserial")
+            # 依欄位對應的車道選擇磅秤（例如重車取進場磅、空車取出場磅）
+            scale_service = scale_registry.for_field(field_key) if scale_registry is not None else None
+            if scale_service is None:
+                messagebox.showerror("錯誤", "磅秤讀取服務未啟動")
+                return
+            if not scale_service.available:
+                messagebox.showerror("錯誤", f"{scale_service.status}\n請執行：pip install pyserial")
+                return
+            if not scale_service.connected:
+                messagebox.showerror("錯誤", f"磅秤未連線\n{scale_service.status}")
                 return
-
-            port = os.environ.get("WEIGHTSTATION_SERIAL_PORT")
-            baud = int(os.environ.get("WEIGHTSTATION_SERIAL_BAUD", "9600"))
-            
-            if not port:
-                ports = [p.device for p in list_ports.comports()]
-                if not ports:
-                    messagebox.showerror("錯誤", "找不到可用的序列埠\n請確認 RS232 設備已連接")
-                    return
-                port = ports[0]
-                print(f"自動選擇序列埠: {port}")
 
             rs_win = tk.Toplevel(root)
-            rs_win.title(f"RS232 讀值 - {selected_cell_column}")
+            rs_win.title(f"RS232 讀值 - {selected_cell_column}（{scale_service.name}）")
             rs_win.geometry("480x260")
             rs_win.resizable(False, False)
             configure_toplevel(rs_win)
 
-            value_var = tk.StringVar(value="0")
-            status_var = tk.StringVar(value=f"連線中：{port} @ {baud}")
+            # 讀取服務常駐在背景，開啟視窗時直接顯示目前的讀數
+            mailbox = scale_service.mailbox
+            # 只有開啟視窗之後才開始的穩定狀態可自動確認，避免帶入前一台車或開窗前的重量
+            opened_at = time.monotonic()
+            mailbox.take()
+            dropped_base = mailbox.dropped
+            value_var = tk.StringVar(value=str(mailbox.latest()))
+            status_var = tk.StringVar(value=scale_service.status)
 
             tk.Label(rs_win, textvariable=status_var, font=("Arial", 12)).pack(pady=(10, 5))
-            tk.Label(rs_win, textvariable=value_var, font=("Arial", 36, "bold"), fg="#2E7D32").pack(pady=(5, 15))
+            value_label = tk.Label(rs_win, textvariable=value_var, font=("Arial", 36, "bold"), fg="#F57C00")
+            value_label.pack(pady=(5, 15))
 
-            # 初始化變數
             stop_event = threading.Event()
-            latest_value = {"value": 0.0}
 
-            def parse_value(text):
-                """從文本中提取數值，支持多種數字格式"""
-                # 預處理：移除 ASCII 範圍外的特殊字符（保留空格、數字、符號）
-                # 這樣 "006\xb830" 會變成 "006830"
-                cleaned_text = ''.join(c if (c.isdigit() or c in '+-. \n\r') else '' for c in text)
-                
-                # 策略1：先嘗試匹配較長的連續數字（最多10位）
-                long_match = re.search(r'[\s+]?([+-]?\d{4,10})(?:[^\d]|$)', cleaned_text)
-                if long_match:
-                    try:
-                        val = float(long_match.group(1))
-                        if val < 1000000:
-                            return val
-                    except:
-                        pass
-                
-                # 策略2：匹配標準 6 位數字格式
-                match_6digits = re.search(r'[\s]?([+-]?\d{6})(?:[^\d]|$)', cleaned_text)
-                if match_6digits:
-                    try:
-                        return float(match_6digits.group(1))
-                    except:
-                        pass
-                
-                # 策略3：找出所有數字片段並智能組合
-                matches = re.findall(r'[-+]?\d{1,10}(?:\.\d+)?', cleaned_text)
-                if not matches:
-                    return None
-                
-                values = []
-                for m in matches:
-                    try:
-                        v = float(m)
-                        values.append(v)
-                    except:
-                        continue
-                
-                if not values:
-                    return None
-                
-                if len(values) == 1:
-                    return values[0]
-                
-                # 嘗試組合相鄰數字
-                if len(matches) >= 2:
-                    combined = ''.join([m.lstrip('+') for m in matches if m.replace('+', '').replace('-', '').replace('.', '').isdigit()])
-                    try:
-                        combined_val = float(combined)
-                        if combined_val < 1000000:
-                            return combined_val
-                    except:
-                        pass
-                
-                non_zero_values = [v for v in values if v != 0.0]
-                if non_zero_values:
-                    return max(non_zero_values)
-                
-                return values[-1]
-
-            def reader_thread(ser):
-                """逐字節讀取 RS232 數據，直到完整接收"""
-                buffer = b""
-                last_valid_value = None
-                
-                while not stop_event.is_set():
-                    try:
-                        # 一次讀取多個位元組以提高效率
-                        data = ser.read(max(1, ser.in_waiting or 1))
-                        if not data:
-                            continue
-                        
-                        buffer += data
-                        
-                        # 檢查是否有完整的一行（以換行符結束）
-                        if b'\n' in buffer:
-                            lines = buffer.split(b'\n')
-                            # 最後一個可能是不完整的，保留在 buffer 中
-                            buffer = lines[-1]
-                            
-                            # 處理完整的行
-                            for line in lines[:-1]:
-                                try:
-                                    # 關鍵修復：磅秤使用帶奇偶校驗位的 RS232 傳輸
-                                    # 需要移除每個位元組的最高位（奇偶校驗位）再提取數字
-                                    # 例如：0xb8 (10111000) & 0x7F = 0x38 ('8')
-                                    ascii_clean = ''.join(
-                                        chr(b & 0x7F) if ((b & 0x7F) in range(48, 58) or (b & 0x7F) in [43, 45, 46]) else ''
-                                        for b in line
-                                    )
-                                    
-                                    # 如果提取到數字，使用清理後的結果
-                                    if ascii_clean and any(c.isdigit() for c in ascii_clean):
-                                        text = ascii_clean
-                                    else:
-                                        # 備用：嘗試解碼並解析
-                                        text = line.decode('utf-8', errors='ignore').strip()
-                                    
-                                    if text:
-                                        # 從文本中提取數字
-                                        val = parse_value(text)
-                                        if val is not None:
-                                            # 過濾明顯錯誤的讀數
-                                            # 如果當前有效值 > 0，突然變成 0，可能是數據分割錯誤
-                                            if val == 0.0 and last_valid_value is not None and last_valid_value > 0.0:
-                                                continue
-                                            
-                                            # 更新顯示值
-                                            latest_value["value"] = val
-                                            last_valid_value = val
-                                            rs_win.after(0, lambda v=val: value_var.set(str(v)))
-                                except Exception as e:
-                                    continue
-                        
-                        # 防止緩衝區無限增長
-                        if len(buffer) > 1000:
-                            buffer = buffer[-100:]
-                            
-                    except Exception as e:
-                        print(f"RS232 讀取錯誤: {e}")
-                        break
-
-            try:
-                ser = serial.Serial(port, baudrate=baud, timeout=1)
-            except Exception as e:
-                messagebox.showerror("錯誤", f"無法開啟序列埠：{e}")
-                rs_win.destroy()
-                return
+            def poll_display():
+                """以固定頻率顯示最新讀數與讀取統計；讀數穩定時以綠色顯示，可自動確認"""
+                if stop_event.is_set():
+                    return
+                taken = mailbox.take_timed()
+                if taken is not None:
+                    val, arrived = taken
+                    value_var.set(str(val))
+                    if arrived is not None:
+                        scale_service.telemetry.latency.record(time.perf_counter() - arrived)
+                stable = scale_service.stable_weight
+                value_label.config(fg="#2E7D32" if stable is not None else "#F57C00")
+                if scale_service.connected:
+                    status_var.set(
+                        f"{scale_service.status}　{'穩定' if stable is not None else '晃動中'}　"
+                        f"{mailbox.read_rate():.1f} 筆/秒　略過 {mailbox.dropped - dropped_base} 筆"
+                    )
+                else:
+                    status_var.set(scale_service.status)
+
+                stable_since = scale_service.stable_since
+                if (RS232_AUTO_CAPTURE and stable is not None and stable > 0
+                        and stable_since is not None and stable_since >= opened_at):
+                    stop_event.set()
+                    apply_numeric_update(stable)
+                    rs_win.destroy()
+                    return
+                rs_win.after(RS232_DISPLAY_INTERVAL_MS, poll_display)
 
-            t = threading.Thread(target=reader_thread, args=(ser,), daemon=True)
-            t.start()
-            
-            # 追蹤執行緒和序列埠以便後續清理
-            thread_info = {
-                'thread': t,
-                'stop_event': stop_event,
-                'serial': ser
-            }
-            active_threads.append(thread_info)
+            # 視窗建立完成後才開始輪詢（自動確認時會關閉視窗）
+            rs_win.after_idle(poll_display)
 
             btn_frame = tk.Frame(rs_win)
             btn_frame.pack(pady=10)
 
             def on_confirm():
                 stop_event.set()
-                try:
-                    ser.close()
-                except Exception:
-                    pass
-                # 從追蹤列表中移除
-                active_threads[:] = [t for t in active_threads if t.get('stop_event') != stop_event]
-                apply_numeric_update(latest_value["value"])
+                # 有穩定重量時取穩定值，否則取最新讀數
+                stable = scale_service.stable_weight
+                apply_numeric_update(stable if stable is not None else mailbox.latest())
                 rs_win.destroy()
 
             def on_cancel():
                 stop_event.set()
-                try:
-                    ser.close()
-                except Exception:
-                    pass
-                # 從追蹤列表中移除
-                active_threads[:] = [t for t in active_threads if t.get('stop_event') != stop_event]
                 selected_cell_column = None
                 rs_win.destroy()
 
@@ -1795,6 +1444,8 @@ def create_app():
                 selected_cell_column = None
                 nopad_win.destroy()
 
+            from NoPad import NumericKeypad
+
             keypad = NumericKeypad(nopad_win, on_confirm_callback=on_nopad_confirm, on_cancel_callback=on_nopad_cancel)
             # 設定初始值（包括 0 值也要顯示）
             if current_value is not None:
@@ -1819,24 +1470,12 @@ def create_app():
         """選取下方表格的品項欄位後，高亮商品區域並允許選擇"""
         nonlocal selected_cell_column
         
-        selection = top_left_tree.selection()
-        if not selection:
+        selected_key = top_left_list.selected_key()
+        if selected_key is None:
             messagebox.showinfo("提示", "請先選擇左上表格資料")
             return
         
-        item = selection[0]
-        values = top_left_tree.item(item, "values")
-        if not values:
-            messagebox.showinfo("提示", "請先選擇左上表格資料")
-            return
-        
-        selected_number = values[0]
-        selected_record = None
-        for record in StockInHand:
-            if record.get("number") == selected_number:
-                selected_record = record
-                break
-        
+        selected_record = StockInHand.get_by_id(selected_key)
         if not selected_record:
             messagebox.showerror("錯誤", "找不到選取的資料")
             return
@@ -1864,9 +1503,6 @@ def create_app():
             messagebox.showerror("錯誤", "找不到選中的品項")
             return
         
-        selected_item = items[item_index]
-        item_id, seq, item_name, heavy, empty, grossw, minus, netw, account, total, price = selected_item
-        
         # 保存原始背景色
         original_bg = top_right_frame.cget("bg")
         
@@ -1878,41 +1514,17 @@ def create_app():
             new_price = ItemValue.get(new_item_name, 0.0)
             
             try:
-                conn = sqlite3.connect("stockinhand.db")
-                cursor = conn.cursor()
-                cursor.execute(
-                    "UPDATE item_details SET item = ?, price = ? WHERE id = ?",
-                    (new_item_name, new_price, item_id)
-                )
-                conn.commit()
-                conn.close()
+                # 同時更新記憶體中的記錄，交易與當日總額以差額更新
+                engine.set_item_product(selected_record, item_index, new_item_name, new_price)
             except sqlite3.OperationalError as e:
                 messagebox.showerror("錯誤", f"更新失敗: {e}")
                 restore_normal_state()
                 return
             
-            # 更新記憶體中的記錄
-            items[item_index] = (item_id, seq, new_item_name, heavy, empty, grossw, minus, netw, account, total, new_price)
-            
-            # 重新計算交易的總額
-            total_account = 0.0
-            for item_row in items:
-                item_grossw = item_row[5] if item_row[5] else 0.0
-                item_minus = item_row[6] if item_row[6] else 0.0
-                item_netw = item_grossw - item_minus
-                item_price = item_row[10] if item_row[10] else 0.0
-                total_account += item_netw * item_price
-            selected_record["total"] = total_account
-            
             render_stockinhand_tree()
             
             # 重新選擇同一行
-            for tree_item in top_left_tree.get_children():
-                if top_left_tree.item(tree_item, "values")[0] == selected_number:
-                    top_left_tree.selection_set(tree_item)
-                    top_left_tree.see(tree_item)
-                    on_top_left_tree_select(None)
-                    break
+            reselect_ticket(selected_record)
             
             restore_normal_state()
         
@@ -1936,8 +1548,54 @@ def create_app():
         create_item_buttons(on_item_selected)
         root.bind("<Button-1>", on_click_outside)
     
-    # 延遲載入資料以確保視窗完全初始化
-    top_left_frame.after(200, load_today_records)
+    def finish_startup():
+        """
+        主視窗顯示後先還原啟動快照，再於背景建立資料庫、載入客戶/商品資料並啟動磅秤服務
+
+        有快照時背景另外查詢當日交易與快照比對，不一致才重新載入；沒有快照時於完成後載入。
+        """
+        snapshot = restore_startup_snapshot()
+        restored = snapshot is not None and snapshot["date"] == today
+        if snapshot is not None:
+            create_item_buttons()
+        if restored:
+            StockInHand.load(snapshot["records"])
+            top_left_list.clear_selection()
+            log.info("已由啟動快照還原 %d 筆今日交易記錄 (%s)", len(StockInHand), today)
+
+        result = {}
+
+        def load_in_background():
+            # 只讀取資料放進 result，全域目錄與畫面由主執行緒在 wait_for_loader 更新
+            try:
+                result["catalog"] = load_startup_data()
+                if restored:
+                    try:
+                        result["records"] = load_day_records(today)
+                    except sqlite3.Error as e:
+                        log.warning("無法驗證啟動快照: %s", e)
+            finally:
+                # 這個執行緒即將結束，它的連線不會再被使用
+                close_thread_connections()
+
+        loader = threading.Thread(target=load_in_background, name="StartupLoader", daemon=True)
+        loader.start()
+
+        def wait_for_loader():
+            if loader.is_alive():
+                root.after(20, wait_for_loader)
+                return
+            # 等待期間若已在主執行緒呼叫 init_data_once，目錄已是最新
+            if result.get("catalog") is not None and not _data_loaded:
+                set_catalog(*result["catalog"])
+            create_item_buttons()
+            if not restored or "records" not in result or records_key(result["records"]) != records_key(StockInHand):
+                load_today_records()
+
+        wait_for_loader()
+
+    # 等第一次繪製（已排入的 idle 工作）完成後才開始載入
+    root.after_idle(lambda: root.after(0, finish_startup))
 
     # 在右邊 frame 添加 5 個正方形按鈕
     button_width = 10  # 按鈕邊長（以字元為單位，對應約 100px）
@@ -1947,27 +1605,16 @@ def create_app():
         """結帳按鈕的回調：設置 closeflag 為 1 或根據點擊次數重置"""
         global checkout_click_count
         
-        selection = top_left_tree.selection()
-        if not selection:
-            messagebox.showinfo("提示", "請先選擇左上表格資料")
-            return
-
-        item = selection[0]
-        values = top_left_tree.item(item, "values")
-        if not values:
+        selected_key = top_left_list.selected_key()
+        if selected_key is None:
             messagebox.showinfo("提示", "請先選擇左上表格資料")
             return
 
-        selected_number = values[0]
-        selected_record = None
-        for record in StockInHand:
-            if record.get("number") == selected_number:
-                selected_record = record
-                break
-
+        selected_record = StockInHand.get_by_id(selected_key)
         if not selected_record:
             messagebox.showerror("錯誤", "找不到選取的資料")
             return
+        selected_number = selected_record.get("number")
         
         # 如果 closeflag 已是 1，計算連續點擊次數
         if selected_record.get('closeflag') == 1:
@@ -1978,19 +1625,10 @@ def create_app():
             
             # 如果點擊次數達到 2 次，取消結帳
             if checkout_click_count[selected_number] >= 2:
-                selected_record['closeflag'] = 0
                 checkout_click_count[selected_number] = 0
                 
-                # 更新資料庫
                 try:
-                    conn = sqlite3.connect("stockinhand.db")
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        "UPDATE stockinhand SET closeflag = ? WHERE id = ?",
-                        (0, selected_record.get("id"))
-                    )
-                    conn.commit()
-                    conn.close()
+                    engine.reopen(selected_record)
                 except sqlite3.OperationalError as e:
                     messagebox.showerror("錯誤", f"取消結帳失敗: {e}")
                     return
@@ -2002,19 +1640,10 @@ def create_app():
                 messagebox.showinfo("提示", f"該筆資料已結帳\n再點擊 {remaining_clicks} 次可取消結帳")
         else:
             # 第一次點擊或之前已取消，設置 closeflag 為 1
-            selected_record['closeflag'] = 1
             checkout_click_count[selected_number] = 0
             
-            # 更新資料庫
             try:
-                conn = sqlite3.connect("stockinhand.db")
-                cursor = conn.cursor()
-                cursor.execute(
-                    "UPDATE stockinhand SET closeflag = ? WHERE id = ?",
-                    (1, selected_record.get("id"))
-                )
-                conn.commit()
-                conn.close()
+                engine.checkout(selected_record)
             except sqlite3.OperationalError as e:
                 messagebox.showerror("錯誤", f"結帳失敗: {e}")
                 return
@@ -2090,13 +1719,28 @@ def create_app():
     return root
 
 
+def load_startup_data():
+    """
+    啟動時在背景執行的初始化：資料庫、磅秤服務，並讀取客戶/商品資料
+
+    回傳 (客戶, 商品)，由主執行緒以 set_catalog 指定給全域目錄；資料庫初始化失敗時回傳 None。
+    """
+    catalog = None
+    try:
+        ensure_databases_once()
+        catalog = (read_customer_data(), read_item_data())
+    except (sqlite3.Error, OSError) as e:
+        log.exception("資料初始化失敗: %s", e)
+    start_scale_services()
+    return catalog
+
+
 def main():
-    """載入資料後啟動 GUI。"""
-    init_data_once()
+    """先顯示主視窗，資料與磅秤服務於背景載入。"""
+    setup_logging()
     app = create_app()
     app.mainloop()
 
 
 if __name__ == "__main__":
-    init_data_once()
     main()
\ No newline at end of file